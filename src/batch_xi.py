@@ -0,0 +1,357 @@
+# 🔹 File: batch_xi.py
+#
+# Batch job: python batch_xi.py contexts.jsonl results.jsonl [--workers N]
+# Generates the XI for every match context in a JSONL or CSV file on a
+# process pool and streams one record per context to JSONL or Parquet as
+# results come in. Rerunning the same command resumes: contexts that already
+# have a record in the output are skipped.
+#
+# Input, one context per line / row, in the shape get_match_context builds:
+#   JSONL  {"id": "...", "Tournament_Type": "Series", "Opponent": "Australia", "Ground": "Home",
+#           "Pitch_Type": "Spin", "Clutch": false, "Unavailable": [...], "Team_Combo": {...}}
+#   CSV    the same columns; Unavailable separated by ";", Team_Combo either as a JSON
+#          column or as Batters, Batting_AR, Spinner_Pure, Spinner_Bowling_AR, Pacer_Pure
+# Instead of a Team_Combo a context can give Rank_Tier (Top/Mid/Low) to use the
+# predicted role counts, as the System Generated page does.
+# "id" is optional (defaults to the 1-based line / row number) and must be unique.
+#
+# Output:
+#   *.jsonl    one XIResult.to_record() per line plus "id", "error" and "seconds",
+#              appended and flushed per context
+#   *.parquet  a directory of part files, each written atomically every --flush-every
+#              records; nested fields are JSON strings. Read with pandas.read_parquet(path).
+# A failed context gets a record with "error" set; --retry-failed runs those again
+# and then rewrites the output without the failed records they replace.
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from xi_pipeline import TEAM_COMBO_KEYS
+from reliability_adjuster import SOLVERS
+
+PARQUET_JSON_FIELDS = ["match_context", "lineup", "batting_weights", "bowling_weights", "reliable_batters", "timings"]
+
+def _parquet_schema():
+    import pyarrow as pa  # optional dependency, only needed for Parquet output
+
+    # Fixed so every part file has the same columns, even one holding only failures
+    return pa.schema([
+        ("id", pa.string()),
+        ("error", pa.string()),
+        ("traceback", pa.string()),
+        ("complete", pa.bool_()),
+        ("solver_status", pa.string()),
+        ("players", pa.list_(pa.string())),
+        ("lineup", pa.string()),
+        ("batting_weights", pa.string()),
+        ("bowling_weights", pa.string()),
+        ("backend", pa.string()),
+        ("batting_solver", pa.string()),
+        ("reliable_batters", pa.string()),
+        ("precomputed", pa.bool_()),
+        ("timings", pa.string()),
+        ("match_context", pa.string()),
+        ("seconds", pa.float64()),
+    ])
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return bool(value)
+
+def normalize_context(raw):
+    """Match context dict from a JSONL object or CSV row (strings), with the sidebar's defaults."""
+    context = {
+        "Tournament_Type": raw["Tournament_Type"],
+        # Only Series matches have an opponent, as in the sidebar
+        "Opponent": (raw.get("Opponent") or None) if raw["Tournament_Type"] == "Series" else None,
+        "Ground": raw["Ground"],
+        "Pitch_Type": raw["Pitch_Type"],
+        "Clutch": _parse_bool(raw.get("Clutch", False)),
+    }
+    unavailable = raw.get("Unavailable") or []
+    if isinstance(unavailable, str):
+        unavailable = [name.strip() for name in unavailable.split(";") if name.strip()]
+    context["Unavailable"] = list(unavailable)
+
+    team_combo = raw.get("Team_Combo")
+    if isinstance(team_combo, str) and team_combo.strip():
+        team_combo = json.loads(team_combo)
+    if not team_combo:
+        missing = [key for key in TEAM_COMBO_KEYS if raw.get(key) in (None, "")]
+        if missing and raw.get("Rank_Tier"):
+            # generate_xi predicts the Team_Combo from the composition history
+            context["Rank_Tier"] = raw["Rank_Tier"]
+            return context
+        if missing:
+            raise ValueError(f"Context needs Team_Combo, the columns {TEAM_COMBO_KEYS} or a Rank_Tier; missing {missing}")
+        team_combo = {key: raw[key] for key in TEAM_COMBO_KEYS}
+    context["Team_Combo"] = {key: int(team_combo[key]) for key in TEAM_COMBO_KEYS}
+    return context
+
+def read_contexts(path):
+    """[(id, match_context)] from a .jsonl/.json or .csv file."""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [(str(i), row) for i, row in enumerate(csv.DictReader(f), start=1)]
+    else:
+        rows = []
+        with open(path, encoding="utf-8") as f:
+            for i, line in enumerate(f, start=1):
+                if line.strip():
+                    rows.append((str(i), json.loads(line)))
+
+    contexts = []
+    seen = set()
+    for default_id, raw in rows:
+        context_id = str(raw.get("id") or default_id)
+        if context_id in seen:
+            raise ValueError(f"Duplicate context id {context_id!r} in {path}")
+        seen.add(context_id)
+        contexts.append((context_id, normalize_context(raw)))
+    return contexts
+
+class JsonlWriter:
+    """Appends one JSON record per line, flushed as it is written."""
+
+    def __init__(self, path):
+        self.path = path
+        self._truncate_partial_line()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _truncate_partial_line(self):
+        # A crash mid-write can leave half a line; drop it so appends start clean
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def existing_records(self):
+        records = []
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        records.append(json.loads(line))
+        return records
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def drop_superseded(self):
+        """Rewrite the file with only the last record per id; returns how many were dropped. Call after close()."""
+        with open(self.path, encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+        last = {str(json.loads(line)["id"]): i for i, line in enumerate(lines)}
+        if len(last) == len(lines):
+            return 0
+        keep = sorted(last.values())
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines[i] for i in keep)
+        os.replace(tmp_path, self.path)
+        return len(lines) - len(keep)
+
+class ParquetWriter:
+    """Buffers records and writes them as numbered part files in the ``path`` directory."""
+
+    def __init__(self, path, flush_every=100):
+        self.schema = _parquet_schema()
+        self.path = path
+        self.flush_every = flush_every
+        self._buffer = []
+        os.makedirs(path, exist_ok=True)
+        self._next_part = len(self._parts())
+
+    def _parts(self):
+        return sorted(name for name in os.listdir(self.path) if name.startswith("part-") and name.endswith(".parquet"))
+
+    def existing_records(self):
+        import pandas as pd
+
+        records = []
+        for name in self._parts():
+            records.extend(pd.read_parquet(os.path.join(self.path, name), columns=["id", "error"]).to_dict("records"))
+        return records
+
+    def write(self, record):
+        row = {name: record.get(name) for name in self.schema.names}
+        for field in PARQUET_JSON_FIELDS:
+            row[field] = json.dumps(row[field])
+        self._buffer.append(row)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self._buffer:
+            return
+        part_path = os.path.join(self.path, f"part-{self._next_part:05d}.parquet")
+        # Dot-prefixed so dataset readers skip a leftover temp file
+        tmp_path = os.path.join(self.path, f".part-{self._next_part:05d}.{os.getpid()}.tmp")
+        pq.write_table(pa.Table.from_pylist(self._buffer, schema=self.schema), tmp_path)
+        os.replace(tmp_path, part_path)
+        self._next_part += 1
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+
+    def drop_superseded(self):
+        """Rewrite the parts as one with only the last record per id; returns how many were dropped. Call after close()."""
+        import pandas as pd
+        import pyarrow as pa
+
+        parts = self._parts()
+        if not parts:
+            return 0
+        # Part files are numbered in write order, so the last row per id is the newest
+        df = pd.concat([pd.read_parquet(os.path.join(self.path, name)) for name in parts], ignore_index=True)
+        keep = ~df["id"].astype(str).duplicated(keep="last")
+        if keep.all():
+            return 0
+        # Parts written before a column was added get it as null
+        df = df[keep].reindex(columns=self.schema.names)
+        self._buffer = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False).to_pylist()
+        self.flush()
+        # The new part holds everything, so a crash before this point only leaves duplicates for the next run
+        for name in parts:
+            os.remove(os.path.join(self.path, name))
+        return int((~keep).sum())
+
+def open_writer(path, flush_every=100):
+    if path.endswith(".parquet"):
+        return ParquetWriter(path, flush_every)
+    return JsonlWriter(path)
+
+def completed_ids(records, retry_failed=False):
+    """Ids the output already covers; with ``retry_failed`` an id counts only once it has succeeded."""
+    done = set()
+    for record in records:
+        if retry_failed and record.get("error"):
+            continue
+        done.add(str(record["id"]))
+    return done
+
+def _init_worker(threads, warm):
+    # Shared read-only data is loaded once here and reused by every context this worker runs
+    from runtime_config import configure
+    configure(threads=threads, max_concurrent=1)
+    if warm:
+        from data_repository import TABLE_NAMES, get_table
+        from reliability_adjuster import get_reliability_index
+        for name in TABLE_NAMES:
+            get_table(name)
+        get_reliability_index()
+
+def run_context(context_id, match_context, backend=None, use_precomputed=True, stage_workers=1, solver=None):
+    # One stage at a time by default: the pool already keeps every core busy with whole contexts
+    from xi_pipeline import generate_xi
+
+    start = time.perf_counter()
+    record = {"id": context_id}
+    try:
+        result = generate_xi(
+            match_context, backend=backend, use_precomputed=use_precomputed, max_workers=stage_workers, solver=solver
+        )
+        record.update(result.to_record())
+        record.update(error=None, traceback=None)
+    except Exception as e:
+        # One bad context shouldn't stop the run; the record says what went wrong
+        record.update(match_context=match_context, complete=False, players=[], error=f"{type(e).__name__}: {e}")
+        record["traceback"] = traceback.format_exc(limit=5)
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+def _format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+def run_batch(contexts, writer, workers=None, threads=1, backend=None, use_precomputed=True, retry_failed=False,
+              solver=None, log=print):
+    """Generate every context not yet in ``writer``'s output; returns (computed, failed). Closes ``writer``."""
+    computed = failed = 0
+    try:
+        done = completed_ids(writer.existing_records(), retry_failed)
+        pending = [(context_id, context) for context_id, context in contexts if context_id not in done]
+        log(f"{len(contexts)} contexts, {len(contexts) - len(pending)} already done, {len(pending)} to run")
+        if pending:
+            computed, failed = _run_pending(pending, writer, workers, threads, backend, use_precomputed, solver, log)
+    finally:
+        writer.close()
+    if retry_failed:
+        # Retried contexts now have a newer record; drop the failed ones it replaces
+        dropped = writer.drop_superseded()
+        if dropped:
+            log(f"Dropped {dropped} superseded records")
+    return computed, failed
+
+def _run_pending(pending, writer, workers, threads, backend, use_precomputed, solver, log):
+    computed = failed = 0
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads, True))
+    try:
+        futures = [
+            pool.submit(run_context, context_id, context, backend, use_precomputed, 1, solver)
+            for context_id, context in pending
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            writer.write(record)
+            computed += 1
+            failed += bool(record["error"])
+            elapsed = time.perf_counter() - start
+            eta = elapsed / computed * (len(pending) - computed)
+            status = f"FAILED ({record['error']})" if record["error"] else ("ok" if record["complete"] else "incomplete XI")
+            log(f"[{computed}/{len(pending)}] {record['id']}: {status} ({record['seconds']:.1f}s, eta {_format_eta(eta)})")
+    except BaseException:
+        # Finished records are already written; the next run picks up from there
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return computed, failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the Playing XI for every match context in a JSONL or CSV file.")
+    parser.add_argument("contexts", help="Input .jsonl or .csv of match contexts")
+    parser.add_argument("output", help="Output .jsonl file or .parquet directory (resumed if it exists)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    parser.add_argument("--threads", type=int, default=1, help="Torch/LightGBM threads per worker (default: 1)")
+    parser.add_argument("--backend", default=None, help="Score backend: mlp, ridge or gbm (default: PLAYINGXI_SCORE_BACKEND or mlp)")
+    parser.add_argument("--solver", choices=SOLVERS, default=None,
+                        help="Batting-order solver (default: PLAYINGXI_BATTING_SOLVER or greedy)")
+    parser.add_argument("--no-precomputed", action="store_true", help="Ignore precomputed MLP results")
+    parser.add_argument("--retry-failed", action="store_true", help="Run contexts whose earlier record has an error again")
+    parser.add_argument("--flush-every", type=int, default=100, help="Records per Parquet part file")
+    args = parser.parse_args()
+
+    contexts = read_contexts(args.contexts)
+    writer = open_writer(args.output, args.flush_every)
+    try:
+        computed, failed = run_batch(
+            contexts, writer,
+            workers=args.workers,
+            threads=args.threads,
+            backend=args.backend,
+            use_precomputed=not args.no_precomputed,
+            retry_failed=args.retry_failed,
+            solver=args.solver,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume.")
+        sys.exit(130)
+    print(f"{computed} computed, {failed} failed; results in {args.output}")
@@ -0,0 +1,553 @@
+# 🔹 File: benchmarks.py
+#
+# Benchmark suite: python benchmarks.py [--scales 1,2,4,8] [--repeat 5] [--only train_mlp,select]
+#                  [--save-baseline NAME] [--compare NAME]
+# Times every stage of the selection pipeline, from the statistical scores to the
+# end-to-end XI, on the shipped data (scale 1) and on synthetic data with each
+# player cloned ``scale`` times, so the report shows how each stage grows.
+#
+# Every case runs once untimed (warm-up), then --repeat times with the garbage
+# collector paused; the report gives median / min / max. One more run under
+# tracemalloc gives the peak Python heap use. tracemalloc does not see torch's
+# own allocator, so for the MLP cases the peak covers only the pandas/NumPy side.
+# Torch and LightGBM are pinned to --threads threads and seeded (runtime_config).
+#
+# --save-baseline writes the results to data/benchmarks/NAME.json; --compare
+# reads one back and exits with status 1 if any case got slower (or its peak
+# memory bigger) by more than --tolerance. Compare on the machine that saved it.
+
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+BASELINE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "benchmarks"))
+
+SERIES_CONTEXT = {
+    "Tournament_Type": "Series",
+    "Opponent": "Australia",
+    "Ground": "Home",
+    "Pitch_Type": "Spin",
+    "Clutch": False,
+    "Unavailable": [],
+    "Rank_Tier": "Top",
+}
+ICC_CONTEXT = {
+    "Tournament_Type": "ICC",
+    "Opponent": None,
+    "Ground": "Away",
+    "Pitch_Type": "Pace",
+    "Clutch": True,
+    "Unavailable": [],
+    "Rank_Tier": "Mid",
+}
+
+# Differences below these are noise, whatever the ratio
+MIN_TIME_DIFF_MS = 0.5
+MIN_MEMORY_DIFF_KB = 64
+
+# ---------- Data sources ----------
+
+def write_synthetic_data(out_dir, scale, seed=0):
+    """Shipped data with every player cloned ``scale`` times, written to ``out_dir``.
+
+    Clone k of a player is "<name> #k" with a new Player ID and every float
+    column (the scores) multiplied by a random factor in [0.95, 1.05], so clones
+    compete with the originals instead of tying. The match history is repeated
+    ``scale`` times. Clone 0 is the original row, so scale 1 is the shipped data.
+    """
+    from data_repository import DATA_CSV_DIR, DATA_JSON_DIR, MATCH_DATA_FILE, SHIPPED_MATCH_DATA_FILE
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    # Largest ID in the data is well below this, so clone IDs never collide
+    id_step = 10 ** 7
+
+    for name in ["Players", "Fielding_Scores", "Batting_Scores", "Bowler_final_score"]:
+        df = pd.read_csv(os.path.join(DATA_CSV_DIR, f"{name}.csv"))
+        float_cols = df.select_dtypes(include="float").columns
+        clones = [df]
+        for k in range(1, scale):
+            clone = df.copy()
+            clone["Player Name"] = clone["Player Name"] + f" #{k}"
+            if "Player ID" in clone:
+                clone["Player ID"] = clone["Player ID"] + k * id_step
+            clone[float_cols] = clone[float_cols] * rng.uniform(0.95, 1.05, size=(len(clone), len(float_cols)))
+            clones.append(clone)
+        pd.concat(clones, ignore_index=True).to_csv(os.path.join(out_dir, f"{name}.csv"), index=False)
+
+    shutil.copy(os.path.join(DATA_CSV_DIR, "TeamID.csv"), os.path.join(out_dir, "TeamID.csv"))
+
+    with open(os.path.join(DATA_JSON_DIR, SHIPPED_MATCH_DATA_FILE)) as f:
+        matches = json.load(f)
+    repeated = [dict(match, Match_No=f"{match.get('Match_No')}-{k}") for k in range(scale) for match in matches]
+    with open(os.path.join(out_dir, MATCH_DATA_FILE), "w") as f:
+        json.dump(repeated, f)
+
+def _reset_caches():
+    import data_repository
+    import statistical_score_calc
+
+    data_repository.clear_cache()
+    statistical_score_calc.batting_score_cache.clear()
+    statistical_score_calc.bowling_score_cache.clear()
+
+@contextmanager
+def data_source(scale, work_dir, seed=0):
+    """Run the block against the shipped data (scale 1) or a synthetic copy of it.
+
+    data_repository prefers CSV/JSON files in the working directory, so the
+    block runs with ``work_dir`` as working directory: empty for scale 1, or
+    holding the synthetic files. All data caches are dropped on the way in and out.
+    """
+    data_dir = os.path.join(work_dir, f"data_x{scale}")
+    os.makedirs(data_dir, exist_ok=True)
+    if scale > 1:
+        write_synthetic_data(data_dir, scale, seed)
+
+    previous_dir = os.getcwd()
+    os.chdir(data_dir)
+    _reset_caches()
+    try:
+        yield
+    finally:
+        os.chdir(previous_dir)
+        _reset_caches()
+
+@contextmanager
+def scratch_model_store(work_dir):
+    # Trained weights go to a scratch store instead of data/model_store
+    from mlp_trainer import default_store
+
+    previous_root = default_store.root
+    default_store.root = os.path.join(work_dir, "model_store")
+    try:
+        yield default_store
+    finally:
+        default_store.root = previous_root
+
+# ---------- Cases ----------
+
+def prepare_inputs(work_dir, backend=None):
+    """Everything the cases start from, computed once for the current data (untimed)."""
+    from data_repository import get_table, get_derived
+    from statistical_score_calc import (
+        run_statistical_score_calc, run_statistical_bowling_score_calc, build_icc_batting_table,
+        get_feature_target_from_final, get_bowling_feature_target,
+    )
+    from xi_pipeline import BATTING_POSITIONS, iyengar_sudarsan_weights, predict_batting_positions, predict_bowling, resolve_team_combo
+    from composition_rule_engine_new import get_composition_index, load_fallback_model
+    from reliability_adjuster import get_reliability_index
+    from score_backends import default_backend
+
+    inputs = {
+        "batting_scores": get_table("Batting_Scores"),
+        "players": get_table("Players"),
+        "fielding": get_table("Fielding_Scores"),
+        "icc_table": get_derived("icc_batting_table", lambda: build_icc_batting_table(get_table("Batting_Scores"))),
+        "index": get_reliability_index(),
+        "composition_index": get_composition_index(),
+        "backend": backend or default_backend(),
+    }
+    # Trained into a scratch directory, then shared with _predict_fallback through get_derived
+    get_derived("composition_fallback", lambda: load_fallback_model(os.path.join(work_dir, "fallback_model")))
+
+    ctx = dict(SERIES_CONTEXT)
+    ctx["Team_Combo"], _ = resolve_team_combo(ctx)
+    inputs["context"] = ctx
+
+    final_df, _, used_factors = run_statistical_score_calc(ctx)
+    bowl_df, _, bowl_factors = run_statistical_bowling_score_calc(ctx)
+    inputs["positions"] = {}
+    for pos in BATTING_POSITIONS:
+        X, y, _ = get_feature_target_from_final(final_df[final_df["Position"] == pos], used_factors)
+        X_np = X.to_numpy(dtype=np.float32)
+        inputs["positions"][pos] = (X_np, y.to_numpy(dtype=np.float32).reshape(-1, 1), iyengar_sudarsan_weights(X_np))
+    X, y, _ = get_bowling_feature_target(bowl_df, bowl_factors)
+    X_np = X.to_numpy(dtype=np.float32)
+    inputs["bowling"] = (X_np, y.to_numpy(dtype=np.float32).reshape(-1, 1), iyengar_sudarsan_weights(X_np))
+
+    # The selectors start from predicted scores, as in generate_xi
+    position_dfs = predict_batting_positions(final_df, used_factors, ctx["Tournament_Type"], backend=backend)
+    inputs["predicted_batters"] = pd.concat(position_dfs.values(), ignore_index=True)
+    inputs["predicted_bowlers"] = predict_bowling(bowl_df, bowl_factors, backend=backend)
+    return inputs
+
+def _statistical_score(context):
+    def build(inputs):
+        from statistical_score_calc import compute_statistical_score
+
+        icc_table = inputs["icc_table"] if context["Tournament_Type"] != "Series" else None
+        # A fresh shallow copy per call: the Series path adds its Norm_ columns to the frame it gets
+        return lambda: compute_statistical_score(inputs["batting_scores"].copy(deep=False), context, icc_table)
+    return build
+
+def _build_icc_table(inputs):
+    from statistical_score_calc import build_icc_batting_table
+    return lambda: build_icc_batting_table(inputs["batting_scores"])
+
+def _bowling_score(context):
+    def build(inputs):
+        from statistical_score_calc import run_statistical_bowling_score_calc, bowling_score_cache
+
+        def run():
+            bowling_score_cache.clear()  # time the computation, not a cache hit
+            return run_statistical_bowling_score_calc(context)
+        return run
+    return build
+
+def _train_position(pos):
+    def build(inputs):
+        from mlp_trainer import train_mlp
+
+        X_np, y_np, iw = inputs["positions"][pos]
+        # No cache_label, so every call trains from scratch
+        return lambda: train_mlp(X_np, y_np, iw, backend=inputs["backend"])
+    return build
+
+def _train_positions_batched(inputs):
+    from mlp_trainer import train_mlp_batched
+
+    X_list, y_list, iw_list = zip(*inputs["positions"].values())
+    return lambda: train_mlp_batched(list(X_list), list(y_list), list(iw_list), backend=inputs["backend"])
+
+def _train_bowling(inputs):
+    from mlp_trainer import train_mlp
+
+    X_np, y_np, iw = inputs["bowling"]
+    return lambda: train_mlp(X_np, y_np, iw, backend=inputs["backend"])
+
+def _reliable_batters(solver):
+    def build(inputs):
+        from reliability_adjuster import select_most_reliable_batters
+        return lambda: select_most_reliable_batters(
+            inputs["predicted_batters"], inputs["players"], inputs["batting_scores"], solver=solver, index=inputs["index"]
+        )
+    return build
+
+def _dynamic_batters(inputs):
+    from reliability_adjuster import select_dynamic_reliable_batters
+    return lambda: select_dynamic_reliable_batters(
+        inputs["predicted_batters"], inputs["players"], inputs["batting_scores"], inputs["context"], inputs["fielding"], index=inputs["index"]
+    )
+
+def _dynamic_bowlers(inputs):
+    from reliability_adjuster import select_dynamic_reliable_batters, select_dynamic_bowlers_assignment
+
+    # The batting pass runs once here; the case times only the bowling pass that follows it
+    batters = select_dynamic_reliable_batters(
+        inputs["predicted_batters"], inputs["players"], inputs["batting_scores"], inputs["context"], inputs["fielding"], index=inputs["index"]
+    )
+    used_positions = batters["Position"].tolist() if not batters.empty else []
+    used_players = batters["Player Name"].tolist() if not batters.empty else []
+    return lambda: select_dynamic_bowlers_assignment(
+        inputs["predicted_bowlers"], inputs["fielding"], inputs["batting_scores"], inputs["context"],
+        used_positions, used_players, index=inputs["index"]
+    )
+
+def _optimal_xi(inputs):
+    from reliability_adjuster import select_optimal_xi
+    return lambda: select_optimal_xi(
+        inputs["predicted_batters"], inputs["predicted_bowlers"], inputs["batting_scores"], inputs["fielding"],
+        inputs["context"], index=inputs["index"]
+    )
+
+def _role_counts_lookup(inputs):
+    from composition_rule_engine_new import get_predicted_role_counts
+
+    ctx = SERIES_CONTEXT
+    return lambda: get_predicted_role_counts(ctx["Pitch_Type"], ctx["Ground"], ctx["Rank_Tier"], ctx["Opponent"])
+
+def _role_counts_fallback(inputs):
+    # The shipped history matches every valid context, so call the fallback directly
+    from composition_rule_engine_new import _predict_fallback
+
+    ctx = SERIES_CONTEXT
+    contexts = [(ctx["Pitch_Type"], ctx["Ground"], ctx["Rank_Tier"], ctx["Opponent"])]
+    return lambda: _predict_fallback(contexts, inputs["composition_index"].role_cols)
+
+def _role_counts_fallback_training(inputs):
+    from composition_rule_engine_new import train_ml_model
+
+    engine = inputs["composition_index"]
+    return lambda: train_ml_model(engine.df, engine.role_cols)
+
+def _generate_xi(cold, stage_workers=None):
+    def build(inputs):
+        import statistical_score_calc
+        from xi_pipeline import generate_xi
+        from mlp_trainer import default_store
+
+        store_root = default_store.root
+
+        def run():
+            if cold:
+                # Nothing cached: scores are recomputed and every model is trained
+                statistical_score_calc.batting_score_cache.clear()
+                statistical_score_calc.bowling_score_cache.clear()
+                os.makedirs(store_root, exist_ok=True)
+                default_store.root = tempfile.mkdtemp(prefix="cold_", dir=store_root)
+            try:
+                return generate_xi(SERIES_CONTEXT, backend=inputs["backend"], use_precomputed=False, max_workers=stage_workers)
+            finally:
+                default_store.root = store_root
+        return run
+    return build
+
+# (name, build(inputs) -> callable to time, allocates through torch)
+CASES = [
+    ("compute_statistical_score[Series]", _statistical_score(SERIES_CONTEXT), False),
+    ("compute_statistical_score[ICC]", _statistical_score(ICC_CONTEXT), False),
+    ("build_icc_batting_table", _build_icc_table, False),
+    ("run_statistical_bowling_score_calc[Series]", _bowling_score(SERIES_CONTEXT), False),
+    ("run_statistical_bowling_score_calc[ICC]", _bowling_score(ICC_CONTEXT), False),
+] + [
+    (f"train_mlp[Position_{pos}]", _train_position(pos), True) for pos in range(1, 8)
+] + [
+    ("train_mlp_batched[Positions 1-7]", _train_positions_batched, True),
+    ("train_mlp[Bowling]", _train_bowling, True),
+    ("select_most_reliable_batters[greedy]", _reliable_batters("greedy"), False),
+    ("select_most_reliable_batters[hungarian]", _reliable_batters("hungarian"), False),
+    ("select_dynamic_reliable_batters", _dynamic_batters, False),
+    ("select_dynamic_bowlers_assignment", _dynamic_bowlers, False),
+    ("select_optimal_xi", _optimal_xi, False),
+    ("get_predicted_role_counts[lookup]", _role_counts_lookup, False),
+    ("get_predicted_role_counts[fallback predict]", _role_counts_fallback, False),
+    ("get_predicted_role_counts[fallback training]", _role_counts_fallback_training, False),
+    ("generate_xi[cold]", _generate_xi(cold=True), True),
+    ("generate_xi[warm]", _generate_xi(cold=False), True),
+    # Stage concurrency (run_stages): only a host with several cores shows a difference
+    ("generate_xi[cold, 1 stage worker]", _generate_xi(cold=True, stage_workers=1), True),
+    ("generate_xi[cold, 4 stage workers]", _generate_xi(cold=True, stage_workers=4), True),
+]
+
+# ---------- Measurement ----------
+
+def measure(fn, repeat=5, warmup=1, trace_memory=True):
+    """Median / min / max wall time of ``fn()`` over ``repeat`` runs, plus its traced peak memory."""
+    for _ in range(warmup):
+        fn()
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        gc_enabled = gc.isenabled()
+        gc.disable()  # as timeit does, so a collection doesn't land in one run only
+        start = time.perf_counter()
+        try:
+            fn()
+        finally:
+            times.append(time.perf_counter() - start)
+            if gc_enabled:
+                gc.enable()
+
+    result = {
+        "median_ms": statistics.median(times) * 1000,
+        "min_ms": min(times) * 1000,
+        "max_ms": max(times) * 1000,
+        "stdev_ms": statistics.stdev(times) * 1000 if len(times) > 1 else 0.0,
+        "repeat": repeat,
+        "peak_kb": None,
+    }
+    if trace_memory:
+        # A separate run: tracing slows allocation down, so it never shares a run with the timings
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result["peak_kb"] = peak / 1024
+    return result
+
+def select_cases(only=None):
+    if not only:
+        return list(CASES)
+    patterns = [pattern.strip() for pattern in only.split(",") if pattern.strip()]
+    return [case for case in CASES if any(pattern in case[0] for pattern in patterns)]
+
+def run_benchmarks(scales=(1,), repeat=5, warmup=1, only=None, backend=None, seed=0, trace_memory=True, log=print):
+    """{"<case>@x<scale>": measurement} for every selected case at every scale."""
+    from data_repository import data_version
+
+    cases = select_cases(only)
+    if not cases:
+        raise ValueError(f"No benchmark matches {only!r}")
+
+    results = {}
+    data_versions = {}
+    work_dir = tempfile.mkdtemp(prefix="playingxi_bench_")
+    try:
+        with scratch_model_store(work_dir):
+            for scale in scales:
+                with data_source(scale, work_dir, seed):
+                    data_versions[f"x{scale}"] = data_version()
+                    started = time.perf_counter()
+                    inputs = prepare_inputs(work_dir, backend)
+                    log(f"scale x{scale}: inputs ready in {time.perf_counter() - started:.1f}s "
+                        f"({len(inputs['players'])} players, {len(inputs['batting_scores'])} batting rows)")
+                    for name, build, torch_memory in cases:
+                        result = measure(build(inputs), repeat, warmup, trace_memory)
+                        result.update(case=name, scale=scale, torch_memory=torch_memory)
+                        results[f"{name}@x{scale}"] = result
+                        log(f"  {name:<46} {result['median_ms']:>10.2f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results, data_versions
+
+def environment_info():
+    from runtime_config import get_settings
+
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "runtime": get_settings(),
+    }
+    for module_name in ["numpy", "pandas", "torch", "lightgbm", "scipy"]:
+        module = sys.modules.get(module_name)
+        info[module_name] = getattr(module, "__version__", None) if module else None
+    try:
+        import resource
+        # ru_maxrss is KB on Linux, bytes on macOS
+        info["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+    except ImportError:
+        info["max_rss_kb"] = None  # no resource module on Windows
+    return info
+
+# ---------- Reports ----------
+
+def format_report(results):
+    lines = [f"{'case':<46} {'scale':>5} {'median ms':>10} {'min ms':>9} {'max ms':>9} {'peak KB':>10}"]
+    for result in results.values():
+        peak = "n/a" if result["peak_kb"] is None else f"{result['peak_kb']:.0f}{'*' if result['torch_memory'] else ''}"
+        lines.append(
+            f"{result['case']:<46} {'x' + str(result['scale']):>5} {result['median_ms']:>10.2f} "
+            f"{result['min_ms']:>9.2f} {result['max_ms']:>9.2f} {peak:>10}"
+        )
+    if any(result["torch_memory"] for result in results.values()):
+        lines.append("* torch tensors are not traced; the peak covers Python / NumPy allocations only")
+    return "\n".join(lines)
+
+def format_scaling(results):
+    """Median time per scale for each case, with the log-log slope (1 = linear in the data size)."""
+    by_case = {}
+    for result in results.values():
+        by_case.setdefault(result["case"], {})[result["scale"]] = result["median_ms"]
+    scales = sorted({result["scale"] for result in results.values()})
+    if len(scales) < 2:
+        return ""
+
+    lines = [f"{'case':<46} " + " ".join(f"{'x' + str(s) + ' ms':>10}" for s in scales) + f" {'slope':>6}"]
+    for case, times in by_case.items():
+        points = [(s, times[s]) for s in scales if s in times and times[s] > 0]
+        slope = np.polyfit(np.log([s for s, _ in points]), np.log([t for _, t in points]), 1)[0] if len(points) > 1 else float("nan")
+        cells = " ".join(f"{times[s]:>10.2f}" if s in times else f"{'':>10}" for s in scales)
+        lines.append(f"{case:<46} {cells} {slope:>6.2f}")
+    return "\n".join(lines)
+
+def baseline_path(name):
+    # A bare name lives in data/benchmarks; anything that looks like a path is used as is
+    if name.endswith(".json") or os.sep in name:
+        return name
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+def save_baseline(path, results, meta):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    os.replace(tmp_path, path)
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+def compare_results(results, baseline, tolerance=0.25):
+    """[(key, metric, baseline, current, ratio, regressed)] for every case present in both runs."""
+    rows = []
+    for key, current in results.items():
+        previous = baseline["results"].get(key)
+        if previous is None:
+            continue
+        metrics = [("median_ms", MIN_TIME_DIFF_MS), ("peak_kb", MIN_MEMORY_DIFF_KB)]
+        for metric, min_diff in metrics:
+            old, new = previous.get(metric), current.get(metric)
+            if old is None or new is None:
+                continue
+            ratio = new / old if old > 0 else float("inf")
+            regressed = ratio > 1 + tolerance and new - old > min_diff
+            rows.append((key, metric, old, new, ratio, regressed))
+    return rows
+
+def format_comparison(rows, baseline_meta, meta):
+    lines = []
+    for field in ["cpu_count", "python", "torch", "numpy", "pandas"]:
+        if baseline_meta.get(field) != meta.get(field):
+            lines.append(f"warning: baseline {field} {baseline_meta.get(field)!r} differs from this run's {meta.get(field)!r}")
+    lines.append(f"{'case':<52} {'metric':<9} {'baseline':>10} {'now':>10} {'ratio':>6}")
+    for key, metric, old, new, ratio, regressed in rows:
+        lines.append(f"{key:<52} {metric:<9} {old:>10.2f} {new:>10.2f} {ratio:>6.2f}{'  REGRESSION' if regressed else ''}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the Playing XI selection pipeline.")
+    parser.add_argument("--scales", default="1", help="Comma-separated data scales; 1 is the shipped data (default: 1)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs before timing (default: 1)")
+    parser.add_argument("--only", default=None, help="Comma-separated substrings; run only the cases whose name contains one")
+    parser.add_argument("--backend", default=None, help="Score backend: mlp, ridge or gbm (default: PLAYINGXI_SCORE_BACKEND or mlp)")
+    parser.add_argument("--threads", type=int, default=1, help="Torch/LightGBM threads (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic data (training uses PLAYINGXI_SEED)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Save results as data/benchmarks/NAME.json (or a .json path)")
+    parser.add_argument("--compare", metavar="NAME", help="Compare with a saved baseline; exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown / memory growth before a regression (default: 0.25)")
+    args = parser.parse_args()
+
+    from runtime_config import configure
+
+    # Fixed threads per training run and deterministic kernels; two runs at once lets the
+    # batting and bowling models train side by side in the concurrent-stage cases
+    configure(threads=args.threads, max_concurrent=2, deterministic=True)
+    scales = [int(scale) for scale in args.scales.split(",")]
+    results, data_versions = run_benchmarks(
+        scales, args.repeat, args.warmup, args.only, args.backend, args.seed, trace_memory=not args.no_memory
+    )
+    meta = dict(environment_info(), data_versions=data_versions, scales=scales, repeat=args.repeat,
+                warmup=args.warmup, backend=args.backend, seed=args.seed, created=time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+    print()
+    print(format_report(results))
+    scaling = format_scaling(results)
+    if scaling:
+        print()
+        print(scaling)
+
+    if args.save_baseline:
+        path = baseline_path(args.save_baseline)
+        save_baseline(path, results, meta)
+        print(f"\nBaseline saved to {path}")
+
+    if args.compare:
+        baseline = load_baseline(baseline_path(args.compare))
+        rows = compare_results(results, baseline, args.tolerance)
+        print()
+        print(format_comparison(rows, baseline["meta"], meta))
+        regressions = [row for row in rows if row[5]]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
@@ -1,15 +1,19 @@
+import os
 import json
+import pickle
+import itertools
+import threading
+from importlib import metadata
 import pandas as pd
 import numpy as np
-import lightgbm as lgb
-from sklearn.model_selection import train_test_split
-from sklearn.multioutput import MultiOutputRegressor
-from sklearn.preprocessing import LabelEncoder
+from data_repository import get_match_data, get_derived, data_version
+from runtime_config import training_slot, lightgbm_params
+
+DEFAULT_FALLBACK_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "fallback_model"))
 
 # Load match data
 def load_match_data():
-    with open("team_composition_updated_new.json") as f:
-        return json.load(f)
+    return get_match_data()
 
 # Prepare dataset
 def prepare_dataset(match_data):
@@ -40,6 +44,11 @@ def prepare_dataset(match_data):
 
 # Train fallback ML model
 def train_ml_model(df, role_cols):
+    # Imported here so that loading the sidebar doesn't pay for lightgbm/sklearn
+    import lightgbm as lgb
+    from sklearn.multioutput import MultiOutputRegressor
+    from sklearn.preprocessing import LabelEncoder
+
     le_opponent = LabelEncoder()
     le_pitch = LabelEncoder()
     le_homeaway = LabelEncoder()
@@ -53,64 +62,267 @@ def train_ml_model(df, role_cols):
     })
 
     y = df[role_cols]
-    model = MultiOutputRegressor(lgb.LGBMRegressor(random_state=42))
-    model.fit(X_cat, y)
+    # Thread cap and seed come from runtime_config (random_state defaults to 42)
+    model = MultiOutputRegressor(lgb.LGBMRegressor(**lightgbm_params()))
+    with training_slot(use_torch=False):
+        model.fit(X_cat, y)
 
     return model, (le_opponent, le_pitch, le_homeaway, le_rank)
 
-# Main callable function
-def get_predicted_role_counts(pitch, homeaway, rank_tier, opponent=None):
-    match_data = load_match_data()
-    df, role_cols = prepare_dataset(match_data)
+CONTEXT_FIELDS = ("Pitch_Type", "HomeAway", "Rank_Tier", "Opponent")
+MIN_MATCH_SCORE = 2
+TOP_K = 5
+SQUAD_SIZE = 11
+# Batting positions 1-7 hold every batter, wicketkeeper and batting all-rounder (see select_optimal_xi)
+MAX_BATTING_ROLES = 7
+BATTING_ROLES = ("Batsman", "Wicketkeeper", "Batting Allrounder Spinner", "Batting Allrounder Pacer")
 
-    # Build composition map
-    composition_map = {}
-    for _, row in df.iterrows():
-        key = (row["Pitch_Type"], row["HomeAway"], row["Rank_Tier"], row["Opponent"])
-        composition_map[key] = {role: row[role] for role in role_cols}
+class CompositionIndex:
+    """Historical wins for the top-k vote over (Pitch, HomeAway, Rank_Tier, Opponent).
 
-    input_context = (pitch, homeaway, rank_tier, opponent)
+    Every win is a row of ``context_matrix`` (integer codes per field) next to
+    its role counts in ``role_matrix``, so a vote is one vectorised comparison.
+    A context only matters through its codes (-1 for a value never seen in a
+    win, None for no opponent), so ``votes`` holds the default top-k vote for
+    every code combination and a lookup never rescans the history.
+    """
 
-    def context_similarity(ctx1, ctx2):
-        # If opponent is None, compare only first 3 fields
-        if ctx1[3] is None:
-            return sum(1 for a, b in zip(ctx1[:3], ctx2[:3]) if a == b)
-        else:
-            return sum(1 for a, b in zip(ctx1, ctx2) if a == b)
+    def __init__(self, df, role_cols):
+        self.df = df
+        self.role_cols = role_cols
+
+        # Integer-coded contexts of every win, in match order
+        self.field_codes = []
+        columns = []
+        for field in CONTEXT_FIELDS:
+            values = df[field].tolist()
+            codes = {value: code for code, value in enumerate(dict.fromkeys(values))}
+            self.field_codes.append(codes)
+            columns.append([codes[value] for value in values])
+        self.context_matrix = np.array(columns, dtype=np.int32).T.reshape(len(df), len(CONTEXT_FIELDS))
+        self.role_matrix = df[role_cols].to_numpy(dtype=np.float64)
+
+        # Exact-context index: one vote per code combination, computed in one pass
+        keys = list(itertools.product(
+            *[range(-1, len(codes)) for codes in self.field_codes[:3]],
+            [None] + list(range(-1, len(self.field_codes[3]))),
+        ))
+        self.votes = dict(zip(keys, self._votes(keys, TOP_K)))
+
+    def key(self, input_context):
+        # Values never seen in a win get -1 and match nothing; a missing opponent is not compared
+        codes = tuple(codes.get(value, -1) for codes, value in zip(self.field_codes, input_context))
+        return codes[:3] + (None,) if input_context[3] is None else codes
+
+    def top_k_vote(self, input_context, k=TOP_K):
+        """Role counts voted by the k most similar wins (score >= 2), or None when there are none.
+
+        Each win votes with weight 0.5 ** (best score - its score), so exact
+        matches dominate and near matches smooth them; ties keep match order.
+        The weighted mean composition is rounded to whole players summing to 11.
+        """
+        return self.top_k_votes([input_context], k)[0]
+
+    def top_k_votes(self, input_contexts, k=TOP_K):
+        """top_k_vote for many contexts: index lookups for the default k, else one (contexts x wins) comparison."""
+        keys = [self.key(ctx) for ctx in input_contexts]
+        if k != TOP_K:
+            return self._votes(keys, k)
+        # Copies, so callers can't edit the shared index
+        return [None if self.votes[key] is None else dict(self.votes[key]) for key in keys]
+
+    def _votes(self, keys, k):
+        if not keys:
+            return []
+        if len(self.context_matrix) == 0:
+            return [None] * len(keys)
+        encoded = np.array([[-1 if code is None else code for code in key] for key in keys], dtype=np.int32)
+        # Without an opponent only the first three fields are compared
+        compared = np.ones(encoded.shape, dtype=bool)
+        compared[:, 3] = [key[3] is not None for key in keys]
+        scores = ((self.context_matrix[None, :, :] == encoded[:, None, :]) & compared[:, None, :]).sum(axis=2)
+
+        top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        best = top_scores[:, 0]
+        weights = np.where(top_scores >= MIN_MATCH_SCORE, 0.5 ** (best[:, None] - top_scores), 0.0)
+        mean_counts = np.einsum("ck,ckr->cr", weights, self.role_matrix[top]) / np.maximum(weights.sum(axis=1), 1e-12)[:, None]
+
+        return [
+            cap_batting_roles(dict(zip(self.role_cols, normalize_counts(counts))), dict(zip(self.role_cols, counts)))
+            if best_score >= MIN_MATCH_SCORE else None
+            for counts, best_score in zip(mean_counts, best)
+        ]
+
+def normalize_counts(counts, total=SQUAD_SIZE):
+    """Round non-negative role counts to integers summing to ``total`` (largest remainder)."""
+    counts = np.clip(np.asarray(counts, dtype=np.float64), 0, None)
+    if counts.sum() <= 0:
+        return [0] * len(counts)
+    scaled = counts * total / counts.sum()
+    rounded = np.floor(scaled).astype(int)
+    remainder = total - rounded.sum()
+    # Stable sort: equal remainders go to the earlier role
+    for i in np.argsort(-(scaled - rounded), kind="stable")[:remainder]:
+        rounded[i] += 1
+    return [int(v) for v in rounded]
+
+def cap_batting_roles(role_counts, shares=None, limit=MAX_BATTING_ROLES):
+    """Role counts with the batting roles cut to ``limit`` and the excess moved to bowling roles.
+
+    A weighted mean of feasible compositions can round to more batting roles
+    than there are batting positions, which no XI can fill. Each excess player
+    comes off the batting role furthest above its unrounded share in ``shares``
+    (never the last wicketkeeper) and goes to the bowling role furthest below
+    its share; ties go to the earlier role. The total stays the same.
+    """
+    counts = dict(role_counts)
+    batting = [role for role in counts if role in BATTING_ROLES]
+    bowling = [role for role in counts if role not in BATTING_ROLES]
+    excess = sum(counts[role] for role in batting) - limit
+    if excess <= 0 or not bowling:
+        return counts
+
+    shares = shares if shares is not None else counts
+    scale = sum(counts.values()) / (sum(max(shares.get(role, 0), 0) for role in counts) or 1)
+
+    def over_share(role):
+        return counts[role] - max(shares.get(role, 0), 0) * scale
 
-    # Find best match in historical data
-    best_match = None
-    best_score = -1
-    for ctx, comp in composition_map.items():
-        score = context_similarity(input_context, ctx)
-        if score > best_score:
-            best_score = score
-            best_match = (ctx, comp)
+    for _ in range(excess):
+        donor = max((role for role in batting if counts[role] > (role == "Wicketkeeper")), key=over_share)
+        receiver = min(bowling, key=over_share)
+        counts[donor] -= 1
+        counts[receiver] += 1
+    return counts
 
-    if best_match and best_score >= 2:
-        return best_match[1]
+def _build_composition_index():
+    return CompositionIndex(*prepare_dataset(load_match_data()))
 
-    # ML fallback
-    model, encoders = train_ml_model(df, role_cols)
-    le_opponent, le_pitch, le_homeaway, le_rank = encoders
+def get_composition_index():
+    # Built once per data version and shared by every session
+    return get_derived("composition_index", _build_composition_index)
+
+def _library_tag():
+    # Pickles only load reliably under the library versions that wrote them
+    return f"lgb{metadata.version('lightgbm')}-skl{metadata.version('scikit-learn')}"
+
+def fallback_model_path(model_dir=DEFAULT_FALLBACK_DIR):
+    return os.path.join(model_dir, f"composition_fallback_{data_version()[:16]}_{_library_tag()}.pkl")
+
+def load_fallback_model(model_dir=DEFAULT_FALLBACK_DIR):
+    """The LightGBM fallback for this data version: loaded from disk, or trained once and saved.
+
+    Returns {"model", "encoders", "most_common_opponent"}.
+    """
+    path = fallback_model_path(model_dir)
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        pass  # missing or unreadable: retrain below
+
+    engine = get_composition_index()
+    model, encoders = train_ml_model(engine.df, engine.role_cols)
+    fallback = {
+        "model": model,
+        "encoders": encoders,
+        "most_common_opponent": engine.df["Opponent"].mode()[0],
+    }
+    os.makedirs(model_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(fallback, f)
+    os.replace(tmp_path, path)
+    return fallback
+
+def get_fallback_model():
+    # Read from disk (or trained) once per process and data version. The first
+    # call may train for a while; data_repository locks per key, so it only
+    # blocks other callers of this model.
+    return get_derived("composition_fallback", load_fallback_model)
+
+def warm_up():
+    """Build the context index and load (or train and save) the fallback model ahead of the first request."""
+    get_composition_index()
+    get_fallback_model()
+
+def _context_tuples(contexts):
+    # DataFrame with CONTEXT_FIELDS columns, or a list of tuples / dicts
+    if isinstance(contexts, pd.DataFrame):
+        contexts = contexts[list(CONTEXT_FIELDS)].itertuples(index=False, name=None)
+    tuples = []
+    for ctx in contexts:
+        if isinstance(ctx, dict):
+            ctx = tuple(ctx.get(field) for field in CONTEXT_FIELDS)
+        else:
+            ctx = tuple(ctx) + (None,) * (len(CONTEXT_FIELDS) - len(ctx))
+        # A missing opponent may arrive as NaN from a DataFrame
+        opponent = ctx[3] if isinstance(ctx[3], str) or ctx[3] is None or not pd.isna(ctx[3]) else None
+        tuples.append(ctx[:3] + (opponent,))
+    return tuples
+
+def _predict_fallback(contexts, role_cols):
+    # ML fallback: inference only, the model is trained once per data version
+    fallback = get_fallback_model()
+    model = fallback["model"]
+    le_opponent, le_pitch, le_homeaway, le_rank = fallback["encoders"]
 
     # Get most frequent opponent from dataset
-    most_common_opponent = df['Opponent'].mode()[0]
+    most_common_opponent = fallback["most_common_opponent"]
 
     # Handle missing or unknown opponent
-    opponent_for_ml = opponent
-    if opponent_for_ml is None or opponent_for_ml not in le_opponent.classes_:
-        opponent_for_ml = most_common_opponent
-
-    x_input = pd.DataFrame([{
-        "Opponent": le_opponent.transform([opponent_for_ml])[0],
-        "Pitch_Type": le_pitch.transform([pitch])[0],
-        "HomeAway": le_homeaway.transform([homeaway])[0],
-        "Rank_Tier": le_rank.transform([rank_tier])[0]
-    }])
-    y_pred = model.predict(x_input)[0]
-    role_counts = {role: int(round(count)) for role, count in zip(role_cols, y_pred)}
-    return role_counts
+    opponents = [
+        opponent if opponent is not None and opponent in le_opponent.classes_ else most_common_opponent
+        for _, _, _, opponent in contexts
+    ]
+
+    x_input = pd.DataFrame({
+        "Opponent": le_opponent.transform(opponents),
+        "Pitch_Type": le_pitch.transform([ctx[0] for ctx in contexts]),
+        "HomeAway": le_homeaway.transform([ctx[1] for ctx in contexts]),
+        "Rank_Tier": le_rank.transform([ctx[2] for ctx in contexts])
+    })
+    y_pred = model.predict(x_input)
+    return [
+        cap_batting_roles({role: int(round(count)) for role, count in zip(role_cols, row)}, dict(zip(role_cols, row)))
+        for row in y_pred
+    ]
+
+def get_predicted_role_counts_batch(contexts, top_k=TOP_K):
+    """Role counts for many (pitch, homeaway, rank_tier, opponent) contexts, in input order.
+
+    ``contexts`` is a DataFrame with Pitch_Type/HomeAway/Rank_Tier/Opponent
+    columns or a list of tuples or dicts. All contexts are scored against the
+    history in one pass and the fallbacks share a single LightGBM predict.
+    """
+    engine = get_composition_index()
+    contexts = _context_tuples(contexts)
+
+    # Weighted vote of the most similar historical wins
+    results = engine.top_k_votes(contexts, top_k)
+
+    missing = [i for i, role_counts in enumerate(results) if role_counts is None]
+    if missing:
+        predicted = _predict_fallback([contexts[i] for i in missing], engine.role_cols)
+        for i, role_counts in zip(missing, predicted):
+            results[i] = role_counts
+    return results
+
+# Main callable function
+def get_predicted_role_counts(pitch, homeaway, rank_tier, opponent=None, top_k=TOP_K):
+    return get_predicted_role_counts_batch([(pitch, homeaway, rank_tier, opponent)], top_k)[0]
+
+def team_combo_from_role_counts(role_counts):
+    """Team_Combo as the System Generated sidebar builds it from predicted role counts."""
+    return {
+        # Wicketkeepers count as batters; pace and spin all-rounders are pooled
+        "Batters": role_counts.get("Batsman", 0) + role_counts.get("Wicketkeeper", 0),
+        "Batting_AR": role_counts.get("Batting Allrounder Spinner", 0) + role_counts.get("Batting Allrounder Pacer", 0),
+        "Spinner_Pure": role_counts.get("Spinner", 0),
+        "Spinner_Bowling_AR": role_counts.get("Bowling Allrounder Spinner", 0) + role_counts.get("Bowling Allrounder Pacer", 0),
+        "Pacer_Pure": role_counts.get("Pacer", 0),
+    }
 
 # Optional: Streamlit UI for testing
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+# 🔹 File: context_cache.py
+
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from data_repository import data_version
+
+# Match context fields that change the statistical scores (Team_Combo does not)
+SCORE_CONTEXT_FIELDS = ["Tournament_Type", "Opponent", "Ground", "Pitch_Type", "Clutch", "Unavailable"]
+
+def context_key(match_context, fields=SCORE_CONTEXT_FIELDS):
+    """Canonical hash of the given match context fields plus the data version."""
+    canonical = {}
+    for field in fields:
+        value = match_context.get(field)
+        if field == "Unavailable":
+            value = sorted(value or [])
+        canonical[field] = value
+    canonical["_data_version"] = data_version()
+    payload = json.dumps(canonical, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ContextLRUCache:
+    """Thread-safe, size-bounded LRU cache keyed by match context."""
+
+    def __init__(self, maxsize=256, fields=SCORE_CONTEXT_FIELDS):
+        self.maxsize = maxsize
+        self.fields = fields
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, match_context, compute):
+        key = context_key(match_context, self.fields)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        # Computed outside the lock so slow contexts don't block cached ones
+        value = compute(match_context)
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-from composition_rule_engine_new import get_predicted_role_counts
+from composition_rule_engine_new import get_predicted_role_counts, team_combo_from_role_counts
+from precompute_contexts import load_precomputed_role_counts
 
 def get_match_context(players_df, team_df):
     st.sidebar.title("Match Context Configuration")
@@ -28,7 +29,9 @@ def get_match_context(players_df, team_df):
     st.sidebar.markdown("---")
    
     #fetching role counts from knowledge base
-    role_counts = get_predicted_role_counts(pitch_type, home_away, rank_tier, selected_opponent)
+    role_counts = load_precomputed_role_counts(pitch_type, home_away, rank_tier, selected_opponent)
+    if role_counts is None:
+        role_counts = get_predicted_role_counts(pitch_type, home_away, rank_tier, selected_opponent)
 
     st.session_state["button_clicked"] = False
     # Batting Roles
@@ -55,23 +58,13 @@ def get_match_context(players_df, team_df):
         # Batting allrounders change - no backward adjustment needed since batters fixed first
         pass
 
-    # Number of Batsmen input first
-    batsman = role_counts.get("Batsman", 0)
-    wicketkeeper = role_counts.get("Wicketkeeper", 0)
-    num_batters= batsman + wicketkeeper
-    
-    # Batting Allrounders input second, max depends on batters
-    spinner_batting_allrounders=role_counts.get("Batting Allrounder Spinner", 0)
-    pacer_batting_allrounders=role_counts.get("Batting Allrounder Pacer", 0)
-    num_bat_ar = spinner_batting_allrounders+pacer_batting_allrounders
-
-    # Bowling Roles - Spinners
-    spinner_pure =role_counts.get("Spinner", 0)
-    spinner_bowl_ar = role_counts.get("Bowling Allrounder Spinner", 0)+ role_counts.get("Bowling Allrounder Pacer", 0)
-
-
-    # Bowling Roles - Pacers
-    pacer_pure = role_counts.get("Pacer", 0) 
+    # Batters include wicketkeepers; all-rounders are pooled across pace and spin
+    team_combo = team_combo_from_role_counts(role_counts)
+    num_batters = team_combo["Batters"]
+    num_bat_ar = team_combo["Batting_AR"]
+    spinner_pure = team_combo["Spinner_Pure"]
+    spinner_bowl_ar = team_combo["Spinner_Bowling_AR"]
+    pacer_pure = team_combo["Pacer_Pure"]
     pacer_bowl_ar = 0
     
     if "button_clicked" not in st.session_state:
@@ -0,0 +1,137 @@
+# 🔹 File: data_repository.py
+
+import os
+import json
+import hashlib
+import threading
+import pandas as pd
+import data_snapshot
+
+# Repo layout: <root>/data/csv and <root>/data/json hold the shipped data
+DATA_CSV_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "csv"))
+DATA_JSON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "json"))
+
+TABLE_NAMES = [
+    "Players",
+    "TeamID",
+    "Fielding_Scores",
+    "Batting_Scores",
+    "Bowler_final_score",
+]
+
+MATCH_DATA_FILE = "team_composition_updated_new.json"
+SHIPPED_MATCH_DATA_FILE = "team_composition.json"
+
+_cache = {}
+_lock = threading.Lock()  # guards _key_locks
+_key_locks = {}  # one lock per cache key, so a slow loader only blocks callers of that key
+
+def resolve_data_path(filename, data_dir=DATA_CSV_DIR):
+    # Files in the working directory win, matching the old pd.read_csv("X.csv") behaviour
+    if os.path.exists(filename):
+        return filename
+    return os.path.join(data_dir, filename)
+
+def resolve_match_data_path():
+    if os.path.exists(MATCH_DATA_FILE):
+        return MATCH_DATA_FILE
+    return os.path.join(DATA_JSON_DIR, SHIPPED_MATCH_DATA_FILE)
+
+def _source_paths():
+    return [resolve_data_path(f"{name}.csv") for name in TABLE_NAMES] + [resolve_match_data_path()]
+
+def _compute_data_version():
+    digest = hashlib.sha256()
+    found = False
+    for path in _source_paths():
+        if not os.path.exists(path):
+            continue
+        found = True
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    if not found:
+        # Snapshot-only deployment: trust the version recorded at build time
+        manifest = data_snapshot.load_manifest()
+        return manifest["data_version"] if manifest else "unknown"
+    return digest.hexdigest()
+
+def _get_cached(key, loader):
+    value = _cache.get(key)
+    if value is None:
+        with _lock:
+            key_lock = _key_locks.setdefault(key, threading.RLock())
+        # Loaders may look up other cached values; those take their own key's lock
+        with key_lock:
+            value = _cache.get(key)
+            if value is None:
+                value = loader()
+                _cache[key] = value
+    return value
+
+def data_version():
+    """Content hash of the source data, used to key anything derived from it."""
+    return _get_cached("data_version", _compute_data_version)
+
+def _current_snapshot():
+    # A snapshot is only used when it was built from the data currently on disk
+    def load():
+        manifest = data_snapshot.load_manifest()
+        if manifest is None or manifest["data_version"] != data_version():
+            return False
+        return manifest
+    return _get_cached("snapshot_manifest", load)
+
+def _read_only(df):
+    # Rebuild the frame on read-only views of its columns (no data is copied),
+    # so an in-place edit through get_table() raises instead of changing the cache
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        values.flags.writeable = False
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+def _load_table(name):
+    manifest = _current_snapshot()
+    if manifest:
+        return _read_only(data_snapshot.load_snapshot_table(name, manifest))
+    return _read_only(pd.read_csv(resolve_data_path(f"{name}.csv")))
+
+def _load_match_data():
+    manifest = _current_snapshot()
+    if manifest:
+        return data_snapshot.load_snapshot_match_data(manifest)
+    with open(resolve_match_data_path()) as f:
+        return json.load(f)
+
+def get_table(name):
+    """Return a table loaded once per process.
+
+    The result is a shallow copy over read-only arrays: callers may add or
+    replace columns, but editing existing values in place (``df.loc[...] = x``,
+    ``fillna(inplace=True)`` on a column) raises ``ValueError``.
+    """
+    if name not in TABLE_NAMES:
+        raise KeyError(f"Unknown table: {name}")
+    df = _get_cached(("table", name), lambda: _load_table(name))
+    return df.copy(deep=False)
+
+def get_match_data():
+    """Return the historical match list (team_composition JSON), loaded once per process."""
+    return list(_get_cached("match_data", _load_match_data))
+
+def get_derived(name, builder):
+    """Return ``builder()``, computed once per data version and shared by every caller.
+
+    Use this for tables that depend only on the data, never on the match context.
+    The cached object must be treated as read-only.
+    """
+    return _get_cached(("derived", name, data_version()), builder)
+
+def clear_cache():
+    # Drop everything cached, e.g. after the CSVs were regenerated
+    with _lock:
+        _cache.clear()
+        _key_locks.clear()
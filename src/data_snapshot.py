@@ -0,0 +1,162 @@
+# 🔹 File: data_snapshot.py
+#
+# Build step: python data_snapshot.py [--out DIR]
+# Converts data/csv/*.csv and data/json/team_composition.json into one
+# NumPy .npy file per column, so workers can memory-map the data instead of
+# parsing text on every cold start.
+#
+# Workers read the snapshot from PLAYINGXI_SNAPSHOT_DIR (default: data/snapshot),
+# which is also where the build writes unless --out says otherwise.
+#
+# Running workers keep the .npy files memory-mapped, so a rebuild never writes
+# over them: every build goes to a fresh build-* subdirectory and the manifest,
+# swapped in atomically, names the current one. Builds older than the previous
+# one are removed.
+
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+
+DEFAULT_SNAPSHOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "snapshot"))
+MANIFEST_NAME = "manifest.json"
+BUILD_PREFIX = "build-"
+SNAPSHOT_FORMAT = 2
+
+def default_snapshot_dir():
+    return os.environ.get("PLAYINGXI_SNAPSHOT_DIR") or DEFAULT_SNAPSHOT_DIR
+
+MATCH_FIELDS = ["Match_No", "Year", "Opponent", "Team_Rank", "Venue", "HomeAway", "Pitch_Type", "Result"]
+
+def _write_column(series, table_dir, idx):
+    # Numeric columns are stored as-is; strings as int32 codes + a unicode category array
+    values = series.to_numpy()
+    if values.dtype.kind in "biuf":
+        path = f"{idx:03d}.npy"
+        np.save(os.path.join(table_dir, path), values)
+        return {"name": series.name, "kind": "numeric", "file": path}
+
+    codes, categories = pd.factorize(series, use_na_sentinel=True)
+    codes_path = f"{idx:03d}.codes.npy"
+    cats_path = f"{idx:03d}.cats.npy"
+    np.save(os.path.join(table_dir, codes_path), codes.astype(np.int32))
+    np.save(os.path.join(table_dir, cats_path), np.asarray(categories, dtype=str))
+    return {"name": series.name, "kind": "string", "codes": codes_path, "categories": cats_path}
+
+def write_table(df, out_dir, name):
+    table_dir = os.path.join(out_dir, name)
+    os.makedirs(table_dir, exist_ok=True)
+    columns = [_write_column(df.iloc[:, i].rename(col), table_dir, i) for i, col in enumerate(df.columns)]
+    return {"rows": len(df), "columns": columns}
+
+def read_table(snapshot_dir, name, table_meta):
+    table_dir = os.path.join(snapshot_dir, name)
+    data = {}
+    for col in table_meta["columns"]:
+        if col["kind"] == "numeric":
+            data[col["name"]] = np.load(os.path.join(table_dir, col["file"]), mmap_mode="r")
+        else:
+            codes = np.load(os.path.join(table_dir, col["codes"]), mmap_mode="r")
+            categories = np.load(os.path.join(table_dir, col["categories"])).astype(object)
+            values = np.append(categories, np.nan)[codes]  # code -1 picks the trailing NaN
+            data[col["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+def match_data_to_tables(match_data):
+    # One row per match, plus a long (match, role, count) table that keeps each match's role order
+    matches = pd.DataFrame([{field: match.get(field) for field in MATCH_FIELDS} for match in match_data])
+    roles = pd.DataFrame(
+        [
+            {"Match_Index": i, "Role": role, "Count": count}
+            for i, match in enumerate(match_data)
+            for role, count in match.get("Team_Composition", {}).items()
+        ],
+        columns=["Match_Index", "Role", "Count"],
+    )
+    return matches, roles
+
+def tables_to_match_data(matches, roles):
+    compositions = [{} for _ in range(len(matches))]
+    for i, role, count in zip(roles["Match_Index"].tolist(), roles["Role"].tolist(), roles["Count"].tolist()):
+        compositions[i][role] = count
+    match_data = []
+    for i, row in enumerate(matches.to_dict("records")):
+        # Fields the match didn't have come back as None or NaN; leave them out so match.get() defaults still apply
+        row = {k: v for k, v in row.items() if not (v is None or isinstance(v, float) and np.isnan(v))}
+        row["Team_Composition"] = compositions[i]
+        match_data.append(row)
+    return match_data
+
+def build_snapshot(out_dir=None):
+    from data_repository import TABLE_NAMES, resolve_data_path, resolve_match_data_path, data_version
+
+    out_dir = out_dir or default_snapshot_dir()
+    os.makedirs(out_dir, exist_ok=True)
+    version = data_version()
+    build_dir = tempfile.mkdtemp(prefix=f"{BUILD_PREFIX}{version[:16]}-", dir=out_dir)
+    os.chmod(build_dir, 0o755)  # mkdtemp is owner-only; workers may run as another user
+    manifest = {"format": SNAPSHOT_FORMAT, "data_version": version, "build": os.path.basename(build_dir), "tables": {}}
+
+    for name in TABLE_NAMES:
+        df = pd.read_csv(resolve_data_path(f"{name}.csv"))
+        manifest["tables"][name] = write_table(df, build_dir, name)
+
+    with open(resolve_match_data_path()) as f:
+        matches, roles = match_data_to_tables(json.load(f))
+    manifest["match_data"] = {
+        "matches": write_table(matches, build_dir, "match_data_matches"),
+        "roles": write_table(roles, build_dir, "match_data_roles"),
+    }
+
+    # Manifest goes last so a half-written snapshot is never picked up
+    previous = load_manifest(out_dir)
+    tmp_path = os.path.join(out_dir, f"{MANIFEST_NAME}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST_NAME))
+
+    # Workers that loaded the previous manifest may still open its files
+    keep = {manifest["build"], previous["build"] if previous else None}
+    for name in os.listdir(out_dir):
+        if name.startswith(BUILD_PREFIX) and name not in keep:
+            shutil.rmtree(os.path.join(out_dir, name), ignore_errors=True)
+    return manifest
+
+def load_manifest(snapshot_dir=None):
+    path = os.path.join(snapshot_dir or default_snapshot_dir(), MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        return None
+    return manifest
+
+def _build_dir(manifest, snapshot_dir):
+    return os.path.join(snapshot_dir or default_snapshot_dir(), manifest["build"])
+
+def load_snapshot_table(name, manifest, snapshot_dir=None):
+    return read_table(_build_dir(manifest, snapshot_dir), name, manifest["tables"][name])
+
+def load_snapshot_match_data(manifest, snapshot_dir=None):
+    build_dir = _build_dir(manifest, snapshot_dir)
+    meta = manifest["match_data"]
+    matches = read_table(build_dir, "match_data_matches", meta["matches"])
+    roles = read_table(build_dir, "match_data_roles", meta["roles"])
+    return tables_to_match_data(matches, roles)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mappable data snapshot.")
+    parser.add_argument("--out", default=default_snapshot_dir(), help="Output directory for the snapshot (default: $PLAYINGXI_SNAPSHOT_DIR or data/snapshot)")
+    args = parser.parse_args()
+
+    manifest = build_snapshot(args.out)
+    print(f"Snapshot written to {args.out} (data version {manifest['data_version'][:12]})")
+    if os.path.abspath(args.out) != os.path.abspath(default_snapshot_dir()):
+        print(f"  Workers only read it with PLAYINGXI_SNAPSHOT_DIR={os.path.abspath(args.out)}")
+    for name, meta in manifest["tables"].items():
+        print(f"  {name}: {meta['rows']} rows, {len(meta['columns'])} columns")
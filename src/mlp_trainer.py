@@ -1,27 +1,43 @@
 # 🔹 File: mlp_trainer.py
 
-import torch
-import torch.nn as nn
-import torch.optim as optim
+# torch is imported on first use, not at import time: importing it and probing
+# CUDA dominates worker start-up and the pages may be served from caches.
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+import numpy as np
+from functools import lru_cache
+from model_store import default_store, model_key
+from runtime_config import training_slot, torch_generator
+
+# Epochs before early stopping's patience starts counting, see ConvergenceTracker
+MIN_EPOCHS = 40
+
+@lru_cache(maxsize=None)
+def get_device():
+    import torch
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+@lru_cache(maxsize=None)
+def _mlp_class():
+    import torch
+    import torch.nn as nn
+    from torch.nn.utils import skip_init
 
-def train_mlp(X_np, y_np, iyengar_w=None, epochs=100, lr=0.001):
     class MLP(nn.Module):
-        def __init__(self, input_dim, iyengar_w=None):
+        def __init__(self, input_dim, iyengar_w=None, generator=None):
             super().__init__()
-            self.fc1 = nn.Linear(input_dim, 64)
+            # Every parameter is set below, so skip nn.Linear's draws from the global RNG
+            self.fc1 = skip_init(nn.Linear, input_dim, 64)
             if iyengar_w is not None:
                 with torch.no_grad():
                     weight_matrix = torch.tensor(iyengar_w, dtype=torch.float32).repeat(64, 1)
                     self.fc1.weight.copy_(weight_matrix)
                     self.fc1.bias.fill_(0)
             else:
-                nn.init.xavier_uniform_(self.fc1.weight)
+                nn.init.xavier_uniform_(self.fc1.weight, generator=generator)
                 nn.init.zeros_(self.fc1.bias)
 
             self.relu = nn.ReLU()
-            self.fc2 = nn.Linear(64, 1)
+            self.fc2 = skip_init(nn.Linear, 64, 1)
             nn.init.zeros_(self.fc2.weight)
             nn.init.zeros_(self.fc2.bias)
 
@@ -29,23 +45,342 @@ def train_mlp(X_np, y_np, iyengar_w=None, epochs=100, lr=0.001):
             x = self.relu(self.fc1(x))
             return self.fc2(x)
 
-    X_t = torch.tensor(X_np, dtype=torch.float32).to(device)
-    y_t = torch.tensor(y_np, dtype=torch.float32).view(-1, 1).to(device)
+    return MLP
+
+def __getattr__(name):
+    # Keeps mlp_trainer.device / mlp_trainer.MLP working without an eager torch import
+    if name == "device":
+        return get_device()
+    if name == "MLP":
+        return _mlp_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _model_weights(fc1_weight, fc1_bias, fc2_weight, fc2_bias):
+    # Layout stored in the model store, matching the nn.Linear parameters
+    return {
+        "fc1_weight": fc1_weight.detach().cpu().numpy().reshape(64, -1),
+        "fc1_bias": fc1_bias.detach().cpu().numpy().reshape(64),
+        "fc2_weight": fc2_weight.detach().cpu().numpy().reshape(1, 64),
+        "fc2_bias": fc2_bias.detach().cpu().numpy().reshape(1),
+    }
+
+def predict_mlp(weights, X_np):
+    """Inference with stored fc1/fc2 weights (extra entries such as loss_curve are ignored)."""
+    import torch
+
+    device = get_device()
+    model = _mlp_class()(X_np.shape[1]).to(device)
+    with torch.no_grad():
+        model.fc1.weight.copy_(torch.from_numpy(weights["fc1_weight"]))
+        model.fc1.bias.copy_(torch.from_numpy(weights["fc1_bias"]))
+        model.fc2.weight.copy_(torch.from_numpy(weights["fc2_weight"]))
+        model.fc2.bias.copy_(torch.from_numpy(weights["fc2_bias"]))
+    model.eval()
+    with torch.no_grad():
+        X_t = torch.tensor(X_np, dtype=torch.float32).to(device)
+        return model(X_t).cpu().numpy().flatten()
+
+class ConvergenceTracker:
+    """Early stopping: stop once the best loss improved by less than ``tol`` (relative) for ``patience`` epochs.
+
+    Patience only starts counting after ``min_epochs``: the first Adam steps
+    from the Iyengar initialisation can push the loss far above its starting
+    value (0.27 to 37 on some bowling tables), and comparing against that start
+    stops training before it has recovered.
+
+    The loss oscillates, so the epoch training stops at is usually not the best
+    one. With early stopping the trainers keep a copy of the lowest-loss
+    weights, counting only weights produced by an optimizer step, and return
+    them unless the last weights are at least as good.
+    """
+
+    def __init__(self, tol=1e-3, patience=10, min_epochs=MIN_EPOCHS):
+        self.tol = tol
+        self.patience = patience
+        self.min_epochs = min_epochs
+        self.epochs = 0
+        self.best = float("inf")
+        self.stale_epochs = 0
+
+    def update(self, loss_value):
+        self.epochs += 1
+        if self.epochs <= self.min_epochs:
+            return False
+        if loss_value < self.best * (1 - self.tol):
+            self.best = loss_value
+            self.stale_epochs = 0
+        else:
+            self.stale_epochs += 1
+        return self.stale_epochs >= self.patience
+
+def _stopping_key(early_stopping, tol, patience, min_epochs):
+    # Part of the model store key only when early stopping changes the result
+    if not early_stopping:
+        return None
+    return f"early_stopping;tol={tol!r};patience={patience};min_epochs={min_epochs};restore=best-stepped"
+
+def _training_info(loss_curve, epochs, cached=False, final_loss=None):
+    # final_loss describes the returned model; without early stopping that is the last epoch's loss
+    loss_curve = [float(v) for v in loss_curve]
+    if final_loss is None and loss_curve:
+        final_loss = loss_curve[-1]
+    return {
+        "loss_curve": loss_curve,
+        "epochs_run": len(loss_curve),
+        "stopped_early": len(loss_curve) < epochs,
+        "final_loss": None if final_loss is None else float(final_loss),
+        "cached": cached,
+    }
+
+def _other_backend(backend, X_list, y_list, iyengar_ws, return_info):
+    from score_backends import get_backend
+    return get_backend(backend).fit_predict_many(X_list, y_list, iyengar_ws, return_info=return_info)
+
+def _stored_final_loss(weights):
+    # Early-stopped entries record the loss of the weights they hold
+    return float(weights["final_loss"]) if "final_loss" in weights else None
+
+def train_mlp(X_np, y_np, iyengar_w=None, epochs=100, lr=0.001, cache_label=None, store=default_store,
+              early_stopping=False, tol=1e-3, patience=10, min_epochs=MIN_EPOCHS, return_info=False, backend="mlp"):
+    """Train the score MLP and return its predictions on X_np.
+
+    With ``cache_label`` (e.g. ("Position_3", factors)) trained weights are reused from the
+    model store. ``early_stopping`` ends training once the loss stops improving, see
+    ConvergenceTracker. ``return_info`` also returns the loss curve and epochs actually run.
+    Any other ``backend`` ("ridge", "gbm") is fitted by score_backends instead.
+    """
+    if backend != "mlp":
+        result = _other_backend(backend, [X_np], [y_np], [iyengar_w], return_info)
+        return (result[0][0], result[1][0]) if return_info else result[0]
+
+    key = None
+    if cache_label is not None and len(X_np):
+        key = model_key(cache_label, X_np, y_np, iyengar_w, epochs, lr, _stopping_key(early_stopping, tol, patience, min_epochs))
+        weights = store.get(key)
+        if weights is not None:
+            preds = predict_mlp(weights, X_np)
+            if return_info:
+                info = _training_info(weights.get("loss_curve", []), epochs, cached=True, final_loss=_stored_final_loss(weights))
+                return preds, info
+            return preds
 
-    model = MLP(X_np.shape[1], iyengar_w).to(device)
-    criterion = nn.MSELoss()
-    optimizer = optim.Adam(model.parameters(), lr=lr)
+    import torch
+    import torch.nn as nn
+    import torch.optim as optim
+
+    # Thread-capped, and initialised from this run's own seeded generator, see runtime_config
+    with training_slot():
+        device = get_device()
+        X_t = torch.tensor(X_np, dtype=torch.float32).to(device)
+        y_t = torch.tensor(y_np, dtype=torch.float32).view(-1, 1).to(device)
+
+        model = _mlp_class()(X_np.shape[1], iyengar_w, torch_generator()).to(device)
+        criterion = nn.MSELoss()
+        optimizer = optim.Adam(model.parameters(), lr=lr)
+        tracker = ConvergenceTracker(tol, patience, min_epochs)
+        loss_curve = []
+        best_loss, best_state = float("inf"), None
+        final_loss = None
+
+        for epoch in range(epochs):
+            model.train()
+            optimizer.zero_grad()
+            output = model(X_t)
+            loss = criterion(output, y_t)
+            loss.backward()
+
+            loss_curve.append(loss.item())
+            # Epoch 0 measures the initial weights; later losses belong to the previous step's weights
+            if early_stopping and epoch > 0 and loss_curve[-1] < best_loss:
+                best_loss = loss_curve[-1]
+                best_state = {name: value.detach().clone() for name, value in model.state_dict().items()}
+            optimizer.step()
+            if early_stopping and tracker.update(loss_curve[-1]):
+                break
+
+        model.eval()
+        with torch.no_grad():
+            if early_stopping:
+                # Keep the last weights unless a stepped epoch had a lower loss
+                final_loss = criterion(model(X_t), y_t).item()
+                if best_state is not None and best_loss < final_loss:
+                    model.load_state_dict(best_state)
+                    final_loss = best_loss
+            preds = model(X_t).cpu().numpy().flatten()
+
+    if key is not None:
+        weights = _model_weights(model.fc1.weight, model.fc1.bias, model.fc2.weight, model.fc2.bias)
+        weights["loss_curve"] = np.asarray(loss_curve, dtype=np.float64)
+        if final_loss is not None:
+            weights["final_loss"] = np.float64(final_loss)
+        store.put(key, weights)
+    if return_info:
+        return preds, _training_info(loss_curve, epochs, final_loss=final_loss)
+    return preds
+
+def _train_stacked(X_list, y_list, iyengar_ws, epochs, lr, early_stopping=False, tol=1e-3, patience=10,
+                   min_epochs=MIN_EPOCHS):
+    import torch
+    import torch.nn as nn
+    import torch.optim as optim
+
+    device = get_device()
+    n_models = len(X_list)
+    input_dim = X_list[0].shape[1]
+    row_counts = [len(X_np) for X_np in X_list]
+    max_rows = max(max(row_counts), 1)
+
+    X_pad = torch.zeros(n_models, max_rows, input_dim)
+    y_pad = torch.zeros(n_models, max_rows)
+    mask = torch.zeros(n_models, max_rows, dtype=torch.bool)
+    for i, (X_np, y_np) in enumerate(zip(X_list, y_list)):
+        n = row_counts[i]
+        X_pad[i, :n] = torch.tensor(X_np, dtype=torch.float32)
+        y_pad[i, :n] = torch.tensor(y_np, dtype=torch.float32).view(-1)
+        mask[i, :n] = True
+    X_pad, y_pad, mask = X_pad.to(device), y_pad.to(device), mask.to(device)
+    counts = torch.tensor(row_counts, dtype=torch.float32, device=device).clamp(min=1)
+
+    # Same initialisation as train_mlp, one slice per model
+    generator = torch_generator()
+    w1 = torch.empty(n_models, 64, input_dim)
+    for i, iyengar_w in enumerate(iyengar_ws):
+        if iyengar_w is not None:
+            w1[i] = torch.tensor(iyengar_w, dtype=torch.float32).repeat(64, 1)
+        else:
+            nn.init.xavier_uniform_(w1[i], generator=generator)
+    w1 = w1.to(device).requires_grad_()
+    b1 = torch.zeros(n_models, 1, 64, device=device, requires_grad=True)
+    w2 = torch.zeros(n_models, 64, 1, device=device, requires_grad=True)
+    b2 = torch.zeros(n_models, 1, 1, device=device, requires_grad=True)
+    params = [w1, b1, w2, b2]
+
+    def forward(w1, b1, w2, b2):
+        hidden = torch.relu(torch.baddbmm(b1, X_pad, w1.transpose(1, 2)))
+        return torch.baddbmm(b2, hidden, w2).squeeze(-1)
+
+    def model_losses_of(outputs):
+        # Sum of per-model mean losses keeps every model's gradient independent
+        return torch.where(mask, (outputs - y_pad) ** 2, torch.zeros_like(y_pad)).sum(dim=1) / counts
+
+    optimizer = optim.Adam(params, lr=lr)
+    trackers = [ConvergenceTracker(tol, patience, min_epochs) for _ in range(n_models)]
+    loss_curves = [[] for _ in range(n_models)]
+    converged = set()
+    # Per model: lowest loss of stepped weights before it converged, those weights,
+    # and the weights it had when it converged (later steps no longer count for it)
+    best_losses = [float("inf")] * n_models
+    best_params = [p.detach().clone() for p in params]
+    last_params = [p.detach().clone() for p in params]
 
     for epoch in range(epochs):
-        model.train()
         optimizer.zero_grad()
-        output = model(X_t)
-        loss = criterion(output, y_t)
+        model_losses = model_losses_of(forward(*params))
+        loss = model_losses.sum()
         loss.backward()
+
+        newly_converged = []
+        for i, loss_value in enumerate(model_losses.detach().cpu().tolist()):
+            if i in converged:
+                continue
+            loss_curves[i].append(loss_value)
+            # Stepped weights only, as in train_mlp
+            if early_stopping and epoch > 0 and loss_value < best_losses[i]:
+                best_losses[i] = loss_value
+                with torch.no_grad():
+                    for p, best in zip(params, best_params):
+                        best[i] = p[i]
+            if early_stopping and trackers[i].update(loss_value):
+                newly_converged.append(i)
         optimizer.step()
+        with torch.no_grad():
+            for i in newly_converged:
+                for p, last in zip(params, last_params):
+                    last[i] = p[i]
+        converged.update(newly_converged)
+        if len(converged) == n_models:
+            break
 
-    model.eval()
+    final_losses = [None] * n_models
     with torch.no_grad():
-        preds = model(X_t).cpu().numpy().flatten()
+        if early_stopping:
+            for i in range(n_models):
+                if i not in converged:
+                    for p, last in zip(params, last_params):
+                        last[i] = p[i]
+            # Every model keeps its last weights unless a stepped epoch was better, as in train_mlp
+            final_losses = model_losses_of(forward(*last_params)).cpu().tolist()
+            for i in range(n_models):
+                chosen = last_params
+                if best_losses[i] < final_losses[i]:
+                    chosen, final_losses[i] = best_params, best_losses[i]
+                for p, source in zip(params, chosen):
+                    p[i] = source[i]
+        preds = forward(*params).cpu().numpy()
+
+    weights = []
+    for i in range(n_models):
+        model_weights = _model_weights(w1[i], b1[i], w2[i].T, b2[i])
+        model_weights["loss_curve"] = np.asarray(loss_curves[i], dtype=np.float64)
+        if final_losses[i] is not None:
+            model_weights["final_loss"] = np.float64(final_losses[i])
+        weights.append(model_weights)
+    infos = [_training_info(curve, epochs, final_loss=final) for curve, final in zip(loss_curves, final_losses)]
+    return [preds[i, :n] for i, n in enumerate(row_counts)], weights, infos
+
+def train_mlp_batched(X_list, y_list, iyengar_ws=None, epochs=100, lr=0.001, cache_labels=None, store=default_store,
+                      early_stopping=False, tol=1e-3, patience=10, min_epochs=MIN_EPOCHS, return_info=False, backend="mlp"):
+    """Train one MLP per (X, y) pair in a single loop and return their predictions.
+
+    Every model gets its own stacked fc1/fc2 weights; inputs are zero-padded to the
+    largest row count and padded rows are masked out of the loss. Since Adam updates
+    each parameter independently, this matches calling train_mlp on each pair.
+    With ``cache_labels``, models already in the store are only run for inference.
+    Early stopping is tracked per model; ``return_info`` adds one info dict per model.
+    Any other ``backend`` fits each pair with score_backends.
+    """
+    if backend != "mlp":
+        return _other_backend(backend, X_list, y_list, iyengar_ws, return_info)
+    n_models = len(X_list)
+    if n_models == 0:
+        return ([], []) if return_info else []
+    if iyengar_ws is None:
+        iyengar_ws = [None] * n_models
+
+    preds = [None] * n_models
+    infos = [None] * n_models
+    keys = [None] * n_models
+    to_train = []
+    stopping_key = _stopping_key(early_stopping, tol, patience, min_epochs)
+    for i in range(n_models):
+        if cache_labels is not None and len(X_list[i]):
+            keys[i] = model_key(cache_labels[i], X_list[i], y_list[i], iyengar_ws[i], epochs, lr, stopping_key)
+            weights = store.get(keys[i])
+            if weights is not None:
+                preds[i] = predict_mlp(weights, X_list[i])
+                infos[i] = _training_info(weights.get("loss_curve", []), epochs, cached=True, final_loss=_stored_final_loss(weights))
+                continue
+        to_train.append(i)
+
+    if to_train:
+        with training_slot():
+            trained_preds, trained_weights, trained_infos = _train_stacked(
+                [X_list[i] for i in to_train],
+                [y_list[i] for i in to_train],
+                [iyengar_ws[i] for i in to_train],
+                epochs,
+                lr,
+                early_stopping,
+                tol,
+                patience,
+                min_epochs,
+            )
+        for i, model_preds, weights, info in zip(to_train, trained_preds, trained_weights, trained_infos):
+            preds[i] = model_preds
+            infos[i] = info
+            if keys[i] is not None:
+                store.put(keys[i], weights)
 
+    if return_info:
+        return preds, infos
     return preds
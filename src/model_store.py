@@ -0,0 +1,83 @@
+# 🔹 File: model_store.py
+
+import os
+import hashlib
+import threading
+import numpy as np
+
+DEFAULT_MODEL_STORE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "model_store"))
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def model_key(label, X_np, y_np, iyengar_w, epochs, lr, extra=None):
+    """Hash of everything that determines a trained model: label (factors, position), data and settings."""
+    digest = hashlib.sha256()
+    digest.update(repr(label).encode())
+    for arr in (X_np, y_np, iyengar_w):
+        if arr is None:
+            digest.update(b"none")
+            continue
+        arr = np.ascontiguousarray(arr, dtype=np.float32)
+        digest.update(repr(arr.shape).encode())
+        digest.update(arr.tobytes())
+    digest.update(f"epochs={epochs};lr={lr!r}".encode())
+    if extra is not None:
+        digest.update(repr(extra).encode())
+    return digest.hexdigest()
+
+class ModelStore:
+    """Directory of trained MLP weights (.npz), shared by every worker process.
+
+    Writes go to a temporary file that is atomically renamed into place, so
+    readers never see partial files. Files are evicted oldest-access first once
+    the directory grows past ``max_bytes``; a file evicted under a reader just
+    counts as a miss.
+    """
+
+    def __init__(self, root=DEFAULT_MODEL_STORE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.npz")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                weights = {name: data[name] for name in data.files}
+            os.utime(path)  # mark as recently used
+            return weights
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, weights):
+        os.makedirs(self.root, exist_ok=True)
+        # pid and thread id: Streamlit sessions are threads sharing one process
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **weights)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.root, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass  # another worker got there first
+            total -= size
+
+default_store = ModelStore()
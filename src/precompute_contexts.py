@@ -0,0 +1,168 @@
+# 🔹 File: precompute_contexts.py
+#
+# Offline job: python precompute_contexts.py [--workers N] [--force]
+# Enumerates every System Generated match context (no unavailable players),
+# runs scoring, the MLPs and the composition lookup, and stores the results
+# so the pages can serve them without training anything.
+
+import os
+import json
+import pickle
+import hashlib
+import argparse
+import itertools
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from data_repository import get_table, data_version
+from context_cache import context_key
+
+DEFAULT_PRECOMPUTED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "precomputed"))
+
+TOURNAMENT_TYPES = ["ICC", "Series"]
+GROUNDS = ["Home", "Away"]
+PITCH_TYPES = ["Spin", "Pace"]
+CLUTCH_OPTIONS = [False, True]
+RANK_TIERS = ["Top", "Mid", "Low"]
+
+def series_opponents():
+    # Same list the sidebar offers
+    team_df = get_table("TeamID")
+    return [team for team in sorted(team_df["Team"].dropna().unique()) if team != "India"]
+
+def enumerate_contexts():
+    """Every (match context, rank tier) pair the System Generated sidebar can produce."""
+    contexts = []
+    opponents = series_opponents()
+    for tournament_type in TOURNAMENT_TYPES:
+        for opponent in (opponents if tournament_type == "Series" else [None]):
+            for ground, pitch, clutch, rank_tier in itertools.product(GROUNDS, PITCH_TYPES, CLUTCH_OPTIONS, RANK_TIERS):
+                match_context = {
+                    "Tournament_Type": tournament_type,
+                    "Opponent": opponent,
+                    "Ground": ground,
+                    "Pitch_Type": pitch,
+                    "Clutch": clutch,
+                    "Unavailable": [],
+                }
+                contexts.append((match_context, rank_tier))
+    return contexts
+
+def _version_dir(out_dir):
+    return os.path.join(out_dir, data_version()[:16])
+
+def _role_key(pitch, homeaway, rank_tier, opponent):
+    from composition_rule_engine_new import TOP_K, MAX_BATTING_ROLES
+    # The method tag retires files written before the batting-role cap
+    payload = json.dumps([pitch, homeaway, rank_tier, opponent, data_version(), f"top{TOP_K}-bat{MAX_BATTING_ROLES}"])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def score_path(match_context, out_dir=DEFAULT_PRECOMPUTED_DIR):
+    return os.path.join(_version_dir(out_dir), "scores", f"{context_key(match_context)}.pkl")
+
+def role_counts_path(pitch, homeaway, rank_tier, opponent, out_dir=DEFAULT_PRECOMPUTED_DIR):
+    return os.path.join(_version_dir(out_dir), "roles", f"{_role_key(pitch, homeaway, rank_tier, opponent)}.json")
+
+def _atomic_write(path, data, mode):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, mode) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def compute_score_entry(match_context):
+    from statistical_score_calc import run_statistical_score_calc, run_statistical_bowling_score_calc
+    from xi_pipeline import predict_batting_positions, predict_bowling
+
+    final_df, final_weights, used_factors = run_statistical_score_calc(match_context)
+    bowl_df, bowl_weights, bowl_factors = run_statistical_bowling_score_calc(match_context)
+    # Precomputed entries are always MLP results, whatever PLAYINGXI_SCORE_BACKEND says
+    position_dfs, training_info = predict_batting_positions(final_df, used_factors, match_context["Tournament_Type"], return_info=True, backend="mlp")
+    bowl_feature_df, training_info["Bowling"] = predict_bowling(bowl_df, bowl_factors, return_info=True, backend="mlp")
+    return {
+        "position_dfs": position_dfs,
+        "bowl_feature_df": bowl_feature_df,
+        "training_info": training_info,
+    }
+
+def _run_task(task, out_dir):
+    kind, args = task
+    if kind == "scores":
+        entry = compute_score_entry(args)
+        _atomic_write(score_path(args, out_dir), pickle.dumps(entry), "wb")
+    else:
+        from composition_rule_engine_new import get_predicted_role_counts
+        role_counts = get_predicted_role_counts(*args)
+        role_counts = {role: int(count) for role, count in role_counts.items()}
+        _atomic_write(role_counts_path(*args, out_dir=out_dir), json.dumps(role_counts), "w")
+    return task
+
+def _init_worker():
+    # One intra-op thread per process; parallelism comes from the pool
+    from runtime_config import configure
+    configure(threads=1, max_concurrent=1)
+
+def build_tasks(out_dir=DEFAULT_PRECOMPUTED_DIR, force=False):
+    tasks = []
+    seen = set()
+    for match_context, rank_tier in enumerate_contexts():
+        score_task = ("scores", match_context)
+        role_task = ("roles", (match_context["Pitch_Type"], match_context["Ground"], rank_tier, match_context["Opponent"]))
+        for task, path in [
+            (score_task, score_path(match_context, out_dir)),
+            (role_task, role_counts_path(*role_task[1], out_dir=out_dir)),
+        ]:
+            # Contexts that differ only in rank tier share their scores
+            if path in seen:
+                continue
+            seen.add(path)
+            if force or not os.path.exists(path):
+                tasks.append(task)
+    return tasks
+
+def load_precomputed(match_context, out_dir=DEFAULT_PRECOMPUTED_DIR):
+    """Precomputed MLP results for this context, or None when it was not baked."""
+    if match_context.get("Unavailable"):
+        return None
+    path = score_path(match_context, out_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def load_precomputed_role_counts(pitch, homeaway, rank_tier, opponent=None, out_dir=DEFAULT_PRECOMPUTED_DIR):
+    path = role_counts_path(pitch, homeaway, rank_tier, opponent, out_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute scores, MLP predictions and role counts for every match context.")
+    parser.add_argument("--out", default=DEFAULT_PRECOMPUTED_DIR, help="Artifact directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="Recompute entries that already exist")
+    args = parser.parse_args()
+
+    # Trained and saved once here, so the workers only load it
+    from composition_rule_engine_new import warm_up
+    warm_up()
+
+    tasks = build_tasks(args.out, args.force)
+    total_contexts = len(enumerate_contexts())
+    print(f"{total_contexts} contexts, {len(tasks)} entries to compute (data version {data_version()[:12]})")
+
+    done = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(_run_task, task, args.out): task for task in tasks}
+        for future in as_completed(futures):
+            kind, task_args = futures[future]
+            done += 1
+            try:
+                future.result()
+                print(f"[{done}/{len(tasks)}] {kind}: {task_args}")
+            except Exception as e:
+                # The pages fall back to live computation (and their error message) for these
+                failed += 1
+                print(f"[{done}/{len(tasks)}] {kind}: {task_args} FAILED ({type(e).__name__}: {e})")
+    print(f"Artifacts in {_version_dir(args.out)} ({failed} failed)")
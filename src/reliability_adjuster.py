@@ -1,54 +1,193 @@
+import os
+import numpy as np
 import pandas as pd
-import streamlit as st
-from collections import defaultdict
-
-# Load fielding scores CSV
-fielding_df = pd.read_csv("Fielding_Scores.csv")
-fielding_score_map = fielding_df.set_index("Player Name")["Predicted_Fielding_Score"].to_dict()
-
-def select_most_reliable_batters(final_df, roles_df, innings_df):
+from data_repository import get_table, get_derived
+
+SOLVERS = ("greedy", "hungarian")
+DEFAULT_SOLVER = "greedy"
+
+def default_solver():
+    # Batting-order solver for select_most_reliable_batters when the caller doesn't pick one
+    return os.environ.get("PLAYINGXI_BATTING_SOLVER") or DEFAULT_SOLVER
+
+def solve_assignment(scores, fielding, allowed, tie_tol=1e-6):
+    """Exact maximum-score assignment of players (rows) to positions (columns).
+
+    Hungarian algorithm (scipy's linear_sum_assignment), O(n^3). Pairs where
+    ``allowed`` is False are never chosen. As many positions as possible are
+    filled, then the total score is maximised; a position with no allowed
+    player stays empty. Ties are broken lexicographically by fielding: it
+    enters the objective scaled so its total stays below ``tie_tol``, so it
+    only decides between lineups whose scores differ by less than that.
+    Returns [(row, col)] sorted by column.
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    scores = np.asarray(scores, dtype=np.float64)
+    fielding = np.nan_to_num(np.asarray(fielding, dtype=np.float64))
+    allowed = np.asarray(allowed, dtype=bool) & np.isfinite(scores)
+    if scores.size == 0 or not allowed.any():
+        return []
+
+    n_cols = scores.shape[1]
+    fielding_scale = tie_tol / (n_cols * (np.abs(fielding[allowed]).max() + 1))
+    value = np.where(allowed, scores + fielding_scale * fielding, 0.0)
+    # Forbidden pairs cost more than any allowed lineup could gain
+    forbidden_cost = np.abs(value).sum() + 1
+    cost = np.where(allowed, -value, forbidden_cost)
+    rows, cols = linear_sum_assignment(cost)
+    return sorted(((r, c) for r, c in zip(rows, cols) if allowed[r, c]), key=lambda pair: pair[1])
+
+BATTING_ROLES = ["Batsman", "WK-Batsman", "Batting Allrounder"]
+
+class ReliabilityIndex:
+    """Innings and fielding lookups shared by the selectors.
+
+    Per batting position: innings played by each player (a Series indexed by
+    player name, summed over the innings table) with its max and std. Plus
+    Predicted_Fielding_Score keyed by player. Depends only on the data, so the
+    shared instance from get_reliability_index() is built once per data version.
+    """
+
+    __slots__ = ("inns_by_pos", "max_inns_by_pos", "std_inns_by_pos", "fielding_scores")
+
+    def __init__(self, innings_df, fielding_df):
+        innings_summary = innings_df.groupby(["Player Name", "Position"])["Inns"].sum().reset_index()
+        self.inns_by_pos = {}
+        self.max_inns_by_pos = {}
+        self.std_inns_by_pos = {}
+        for pos, pos_summary in innings_summary.groupby("Position", sort=True):
+            pos_inns = pos_summary.set_index("Player Name")["Inns"]
+            self.inns_by_pos[pos] = pos_inns
+            self.max_inns_by_pos[pos] = pos_inns.max()
+            self.std_inns_by_pos[pos] = pos_inns.std()
+        self.fielding_scores = fielding_df.set_index("Player Name")["Predicted_Fielding_Score"].to_dict()
+
+    def position_innings(self, pos):
+        """(innings by player, max innings, innings std) at ``pos``; no innings gives (empty, 1, NaN)."""
+        if pos not in self.inns_by_pos:
+            return pd.Series(dtype=np.float64), 1, np.nan
+        return self.inns_by_pos[pos], self.max_inns_by_pos[pos], self.std_inns_by_pos[pos]
+
+def _build_reliability_index():
+    return ReliabilityIndex(get_table("Batting_Scores"), get_table("Fielding_Scores"))
+
+def get_reliability_index():
+    # Built from the shipped tables once per data version; treat as read-only
+    return get_derived("reliability_index", _build_reliability_index)
+
+def _weight_by_innings(pos_df, index, pos, score_col):
+    # Blend the predicted score with innings played at this position, weighted by their spreads
+    pos_inns, max_inns, std_inns = index.position_innings(pos)
+    std_score = pos_df[score_col].std()
+    total_var = std_score + std_inns + 1e-8
+    alpha = std_score / total_var
+    beta = std_inns / total_var
+
+    pos_df["Inns_at_Pos"] = pos_df["Player Name"].map(pos_inns).fillna(0)
+    pos_df["Max_Inns_Pos"] = max_inns
+    pos_df["Normalized_Inns"] = pos_df["Inns_at_Pos"] / pos_df["Max_Inns_Pos"]
+    pos_df["Effective_Score"] = pos_df[score_col] * (alpha + beta * pos_df["Normalized_Inns"])
+    return pos_df
+
+def batting_position_table(final_df, index, pos):
+    """Batting candidates at ``pos`` with Effective_Score and Fielding_Score, best first, one row per player."""
+    pos_df = final_df[final_df["Position"] == pos].copy()
+    pos_df = pos_df[pos_df["Role"].isin(BATTING_ROLES)]
+
+    pos_df = _weight_by_innings(pos_df, index, pos, "Predicted_Score")
+    pos_df["Fielding_Score"] = pos_df["Player Name"].map(index.fielding_scores).fillna(0)
+
+    pos_df = pos_df.sort_values(by=["Effective_Score", "Fielding_Score"], ascending=False)
+    pos_df = pos_df.drop_duplicates("Player Name")
+    return pos_df
+
+def bowling_position_table(bowlers_df, index, pos):
+    """Bowling candidates at ``pos`` with Effective_Score and Total_Score (bowlers_df carries Fielding_Score)."""
+    pos_df = bowlers_df[bowlers_df["Position"] == pos].copy()
+    if pos_df.empty:
+        return pos_df
+
+    pos_df = _weight_by_innings(pos_df, index, pos, "Predicted_Bowl_Score")
+    pos_df["Total_Score"] = pos_df["Effective_Score"] + pos_df["Fielding_Score"]
+    return pos_df
+
+class PositionCandidates:
+    """One position's candidates as column arrays over the rows of ``table``.
+
+    ``order`` holds the row numbers best first. The selectors work on row
+    numbers and the arrays; a row dict is only built for players who end up
+    selected. Iterating gives (player, score, row dict) in rank order, the
+    shape of the old per-position lists.
+    """
+
+    __slots__ = ("table", "order", "players", "scores", "fielding", "roles", "row_of", "with_rank")
+
+    def __init__(self, table, score_col, sort=False, with_rank=False):
+        self.table = table.reset_index(drop=True)
+        self.players = self.table["Player Name"].to_numpy(dtype=object)
+        self.roles = self.table["Role"].to_numpy(dtype=object)
+        self.scores = self.table[score_col].to_numpy(dtype=np.float64)
+        self.fielding = self.table["Fielding_Score"].to_numpy(dtype=np.float64)
+        if sort:
+            # Python's sort on (-score, -fielding) keeps the old placement of NaN scores
+            self.order = np.array(
+                sorted(range(len(self.table)), key=lambda i: (-self.scores[i], -self.fielding[i])), dtype=np.intp
+            )
+        else:
+            self.order = np.arange(len(self.table), dtype=np.intp)
+        # A player listed more than once keeps their last row
+        self.row_of = {name: row for row, name in enumerate(self.players)}
+        self.with_rank = with_rank
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, k):
+        row = self.order[k]
+        return self.players[row], self.scores[row], self.row_data(row)
+
+    def __iter__(self):
+        for k in range(len(self.order)):
+            yield self[k]
+
+    def ranked(self):
+        """(row, player, score, fielding) best first."""
+        for row in self.order:
+            yield row, self.players[row], self.scores[row], self.fielding[row]
+
+    def row_data(self, row):
+        data = self.table.iloc[row].to_dict()
+        if self.with_rank:
+            data["Rank"] = int(np.flatnonzero(self.order == row)[0]) + 1
+        return data
+
+    def score_of(self, player_name, default=None):
+        row = self.row_of.get(player_name)
+        return default if row is None else self.scores[row]
+
+    def fielding_of(self, player_name, default=None):
+        row = self.row_of.get(player_name)
+        return default if row is None else self.fielding[row]
+
+def select_most_reliable_batters(final_df, roles_df, innings_df, solver="greedy", index=None):
+    """Position-optimal top 7; ``solver`` is "greedy" (fill + swaps) or "hungarian" (exact).
+
+    Returns (best_7_df, position_rankings): the lineup with each player's Rank
+    at their position (empty if nothing could be assigned) and the
+    PositionCandidates for positions 1-7. Pass ``index`` (e.g.
+    get_reliability_index()) to reuse prebuilt innings/fielding lookups.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver {solver!r}; expected one of {SOLVERS}")
     positions = list(range(1, 8))
-    max_inns = innings_df['Inns'].max()
-    innings_summary = innings_df.groupby(["Player Name", "Position"])["Inns"].sum().reset_index()
-    total_inns_per_player = innings_df.groupby("Player Name")['Inns'].sum().to_dict()
-
-    position_rankings = {}
-    player_position_scores = defaultdict(dict)
+    if index is None:
+        index = ReliabilityIndex(innings_df, get_table("Fielding_Scores"))
 
-    for pos in positions:
-        pos_df = final_df[final_df["Position"] == pos].copy()
-        valid_roles = ["Batsman", "WK-Batsman", "Batting Allrounder"]
-        pos_df = pos_df[pos_df["Role"].isin(valid_roles)]
-
-        pos_inns_map = innings_summary[innings_summary["Position"] == pos].set_index("Player Name")["Inns"].to_dict()
-        std_score = pos_df["Predicted_Score"].std()
-        std_inns = pd.Series(pos_inns_map).std()
-        total_var = std_score + std_inns + 1e-8
-        alpha = std_score / total_var
-        beta = std_inns / total_var
-
-        pos_df["Inns_at_Pos"] = pos_df["Player Name"].map(pos_inns_map).fillna(0)
-        pos_df["Max_Inns_Pos"] = max(pos_inns_map.values()) if pos_inns_map else 1
-        pos_df["Normalized_Inns"] = pos_df["Inns_at_Pos"] / pos_df["Max_Inns_Pos"]
-        pos_df["Effective_Score"] = pos_df["Predicted_Score"] * (alpha + beta * pos_df["Normalized_Inns"])
-        pos_df["Fielding_Score"] = pos_df["Player Name"].map(fielding_score_map).fillna(0)
-
-        pos_df = pos_df.sort_values(by=["Effective_Score", "Fielding_Score"], ascending=False)
-        pos_df = pos_df.drop_duplicates("Player Name")
-
-        position_rankings[pos] = []
-        for rank_idx, (_, player) in enumerate(pos_df.iterrows(), start=1):
-            player_name = player["Player Name"]
-            score = player["Effective_Score"]
-            player_data = player.to_dict()
-            player_data["Rank"] = rank_idx  # ⬆️ Add Rank
-
-            position_rankings[pos].append((player_name, score, player_data))
-            player_position_scores[player_name][pos] = {
-                'score': score,
-                'fielding_score': player_data["Fielding_Score"],
-                'data': player_data
-            }
+    position_rankings = {
+        pos: PositionCandidates(batting_position_table(final_df, index, pos), "Effective_Score", with_rank=True)
+        for pos in positions
+    }
 
     class OptimalAssignment:
         def __init__(self):
@@ -94,9 +233,8 @@ def select_most_reliable_batters(final_df, roles_df, innings_df):
             best_available = None
             best_score = -1
             best_fielding = -1
-            for player_name, score, player_data in position_rankings[pos]:
+            for _, player_name, score, fielding in position_rankings[pos].ranked():
                 if not assignment.is_player_assigned(player_name):
-                    fielding = fielding_score_map.get(player_name, 0)
                     if (abs(score - best_score) < 0.001):
                         if fielding > best_fielding:
                             best_available = player_name
@@ -120,10 +258,10 @@ def select_most_reliable_batters(final_df, roles_df, innings_df):
                 current_player = assignment.get_player_at_position(pos)
                 if not current_player:
                     continue
-                current_score = player_position_scores[current_player][pos]['score']
-                current_fielding = player_position_scores[current_player][pos]['fielding_score']
-                for player_name, score, player_data in position_rankings[pos]:
-                    new_fielding = fielding_score_map.get(player_name, 0)
+                candidates = position_rankings[pos]
+                current_score = candidates.score_of(current_player)
+                current_fielding = candidates.fielding_of(current_player)
+                for _, player_name, score, new_fielding in candidates.ranked():
                     if not assignment.is_player_assigned(player_name):
                         if (
                             score > current_score or
@@ -134,8 +272,8 @@ def select_most_reliable_batters(final_df, roles_df, innings_df):
                             break
                     else:
                         other_pos = assignment.player_positions[player_name]
-                        other_current_score = player_position_scores[player_name][other_pos]['score']
-                        current_at_other_score = player_position_scores[current_player].get(other_pos, {}).get('score', 0)
+                        other_current_score = position_rankings[other_pos].score_of(player_name)
+                        current_at_other_score = position_rankings[other_pos].score_of(current_player, 0)
                         if current_at_other_score == 0:
                             continue
                         current_total = current_score + other_current_score
@@ -150,72 +288,54 @@ def select_most_reliable_batters(final_df, roles_df, innings_df):
 
         for pos in positions:
             if pos not in assignment.assignments:
-                for player_name, score, player_data in position_rankings[pos]:
+                for _, player_name, _, _ in position_rankings[pos].ranked():
                     if not assignment.is_player_assigned(player_name):
                         assignment.assign(pos, player_name)
                         break
 
         return assignment
 
-    final_assignment = find_optimal_assignment()
+    def find_exact_assignment():
+        # Player x position Effective_Score matrix; pairs without a ranking are forbidden
+        players = list(dict.fromkeys(name for pos in positions for name in position_rankings[pos].players))
+        player_ids = {name: i for i, name in enumerate(players)}
+        scores = np.zeros((len(players), len(positions)))
+        fielding = np.zeros((len(players), len(positions)))
+        allowed = np.zeros((len(players), len(positions)), dtype=bool)
+        for j, pos in enumerate(positions):
+            candidates = position_rankings[pos]
+            ids = np.array([player_ids[name] for name in candidates.players], dtype=np.intp)
+            scores[ids, j] = candidates.scores
+            fielding[ids, j] = candidates.fielding
+            allowed[ids, j] = True
+
+        assignment = OptimalAssignment()
+        for i, j in solve_assignment(scores, fielding, allowed):
+            assignment.assign(positions[j], players[i])
+        return assignment
+
+    final_assignment = find_exact_assignment() if solver == "hungarian" else find_optimal_assignment()
 
     final_selections = []
-    total_score = 0
     for pos in positions:
         player_name = final_assignment.get_player_at_position(pos)
-        if player_name and pos in player_position_scores[player_name]:
-            player_data = player_position_scores[player_name][pos]['data']
-            final_selections.append(player_data)
-            total_score += player_position_scores[player_name][pos]['score']
-
-    if final_selections:
-        best_7_df = pd.DataFrame(final_selections)
-        best_7_df = best_7_df.sort_values("Position").reset_index(drop=True)
-
-        st.subheader("\U0001F3CF Position-Optimal Batting Lineup")
-        st.write(f"**Total Lineup Score: {total_score:.4f}**")
-        st.dataframe(best_7_df[["Player Name", "Role", "Position", "Rank", "Predicted_Score", "Effective_Score", "Fielding_Score"]])
-
-        #with st.expander("\U0001F4CA Position Performance Analysis"):
-        tab1, tab2 = st.tabs(["\U0001F4CA Position Performance Analysis", "\U0001F501 Assignment Process"])
-        with tab1:
-            st.write("Each position filled with the optimal performer:")
-            for pos in positions:
-                player_name = final_assignment.get_player_at_position(pos)
-                if player_name:
-                    best_for_pos = position_rankings[pos][0][0] if position_rankings[pos] else None
-                    is_optimal_for_position = (player_name == best_for_pos)
-                    player_rank = None
-                    for i, (p_name, _, _) in enumerate(position_rankings[pos]):
-                        if p_name == player_name:
-                            player_rank = i + 1
-                            break
-                    status = "\U0001F947 Optimal" if is_optimal_for_position else f"#{player_rank} choice"
-                    score = player_position_scores[player_name][pos]['score']
-                    st.write(f"**Position {pos}**: {player_name} - {status} (Score: {score:.4f})")
+        row = position_rankings[pos].row_of.get(player_name)
+        if player_name and row is not None:
+            final_selections.append(position_rankings[pos].row_data(row))
 
-        #with st.expander("\U0001F501 Assignment Process"):
-        with tab2:
-            st.write("All candidates considered for each position:")
-            for pos in positions:
-                st.write(f"**Position {pos}:**")
-                assigned_player = final_assignment.get_player_at_position(pos)
-                for i, (player_name, score, _) in enumerate(position_rankings[pos]):
-                    if player_name == assigned_player:
-                        status = "✅ SELECTED"
-                    elif not final_assignment.is_player_assigned(player_name):
-                        status = "⚪ Available for selection"
-                    else:
-                        status = "❌ Already selected"
-                    st.write(f"  {i+1}. {player_name} (Score: {score:.4f}) - {status}")
-                st.write("")
+    if not final_selections:
+        return pd.DataFrame(), position_rankings
+    best_7_df = pd.DataFrame(final_selections)
+    best_7_df = best_7_df.sort_values("Position").reset_index(drop=True)
+    return best_7_df, position_rankings
 
-        return best_7_df, position_rankings
-    else:
-        st.error("Could not create optimal lineup assignments.")
-        return pd.DataFrame()
+def select_dynamic_reliable_batters(final_df, roles_df, innings_df, match_context, fielding_df, index=None):
+    """Greedy role-aware batting lineup for the Team_Combo; the first pass of greedy_xi.
 
-def select_dynamic_reliable_batters(final_df, roles_df, innings_df, match_context, fielding_df):
+    Kept as the fallback for select_optimal_xi when the combo can't be met in
+    full: it fills as many positions as it can. Roles come from ``final_df``;
+    ``roles_df`` is unused.
+    """
 
     positions = list(range(1, 8))
     combo = match_context["Team_Combo"]
@@ -225,46 +345,13 @@ def select_dynamic_reliable_batters(final_df, roles_df, innings_df, match_contex
     required_ars = combo["Batting_AR"]
     required_wk = 1
 
-    fielding_score_map = fielding_df.set_index("Player Name")["Predicted_Fielding_Score"].to_dict()
-    innings_summary = innings_df.groupby(["Player Name", "Position"])["Inns"].sum().reset_index()
+    if index is None:
+        index = ReliabilityIndex(innings_df, fielding_df)
 
-    position_rankings = {}
-    player_position_scores = defaultdict(dict)
-
-    for pos in positions:
-        pos_df = final_df[final_df["Position"] == pos].copy()
-        valid_roles = ["Batsman", "WK-Batsman", "Batting Allrounder"]
-        pos_df = pos_df[pos_df["Role"].isin(valid_roles)]
-
-        pos_inns_map = innings_summary[innings_summary["Position"] == pos].set_index("Player Name")["Inns"].to_dict()
-        std_score = pos_df["Predicted_Score"].std()
-        std_inns = pd.Series(pos_inns_map).std()
-        total_var = std_score + std_inns + 1e-8
-        alpha = std_score / total_var
-        beta = std_inns / total_var
-
-        pos_df["Inns_at_Pos"] = pos_df["Player Name"].map(pos_inns_map).fillna(0)
-        pos_df["Max_Inns_Pos"] = max(pos_inns_map.values()) if pos_inns_map else 1
-        pos_df["Normalized_Inns"] = pos_df["Inns_at_Pos"] / pos_df["Max_Inns_Pos"]
-        pos_df["Effective_Score"] = pos_df["Predicted_Score"] * (alpha + beta * pos_df["Normalized_Inns"])
-        pos_df["Fielding_Score"] = pos_df["Player Name"].map(fielding_score_map).fillna(0)
-
-        pos_df = pos_df.sort_values(by=["Effective_Score", "Fielding_Score"], ascending=False)
-        pos_df = pos_df.drop_duplicates("Player Name")
-
-        position_rankings[pos] = []
-        for rank_idx, (_, player) in enumerate(pos_df.iterrows(), start=1):
-            player_name = player["Player Name"]
-            score = player["Effective_Score"]
-            player_data = player.to_dict()
-            player_data["Rank"] = rank_idx
-
-            position_rankings[pos].append((player_name, score, player_data))
-            player_position_scores[player_name][pos] = {
-                'score': score,
-                'fielding_score': player_data["Fielding_Score"],
-                'data': player_data
-            }
+    position_rankings = {
+        pos: PositionCandidates(batting_position_table(final_df, index, pos), "Effective_Score", with_rank=True)
+        for pos in positions
+    }
 
     class RoleAwareAssignment:
         def __init__(self):
@@ -325,12 +412,12 @@ def select_dynamic_reliable_batters(final_df, roles_df, innings_df, match_contex
             best_available = None
             best_score = -1
             best_fielding = -1
-            for player_name, score, player_data in position_rankings[pos]:
+            candidates = position_rankings[pos]
+            for row, player_name, score, fielding in candidates.ranked():
                 if not assignment.is_player_assigned(player_name):
-                    role = player_data["Role"]
+                    role = candidates.roles[row]
                     if not assignment.can_assign(role):
                         continue
-                    fielding = fielding_score_map.get(player_name, 0)
                     if (abs(score - best_score) < 0.001):
                         if fielding > best_fielding:
                             best_available = (player_name, role)
@@ -346,9 +433,11 @@ def select_dynamic_reliable_batters(final_df, roles_df, innings_df, match_contex
         # Fallback: ensure at least one WK-Batsman
         if assignment.role_counts["WK-Batsman"] < required_wk:
             for pos in positions:
-                for player_name, score, player_data in position_rankings[pos]:
-                    if "WK-Batsman" in player_data["Role"] and not assignment.is_player_assigned(player_name):
-                        assignment.assign(pos, player_name, player_data["Role"])
+                candidates = position_rankings[pos]
+                for row, player_name, _, _ in candidates.ranked():
+                    role = candidates.roles[row]
+                    if "WK-Batsman" in role and not assignment.is_player_assigned(player_name):
+                        assignment.assign(pos, player_name, role)
                         break
                 if assignment.role_counts["WK-Batsman"] >= required_wk:
                     break
@@ -358,28 +447,18 @@ def select_dynamic_reliable_batters(final_df, roles_df, innings_df, match_contex
     final_assignment = find_optimal_assignment()
 
     final_selections = []
-    total_score = 0
     for pos in sorted(final_assignment.assignments.keys()):
         player_name = final_assignment.get_player_at_position(pos)
-        if player_name and pos in player_position_scores[player_name]:
-            player_data = player_position_scores[player_name][pos]['data']
-            final_selections.append(player_data)
-            total_score += player_position_scores[player_name][pos]['score']
-
-    if final_selections:
-        best_df = pd.DataFrame(final_selections).sort_values("Position").reset_index(drop=True)
-        st.markdown("<br><br>",unsafe_allow_html=True)
-        st.subheader("🧠 Role-Constrained Position-Optimal Batting Lineup")
-        #st.write("This lineup arranges players into the best batting positions, based on the number of batsmen (including WK-Batsman) and batting all-rounders selected by you.")
-        st.write(f"**Total Lineup Score: {total_score:.4f}**")
-        st.dataframe(best_df[["Player Name", "Role", "Position", "Predicted_Score"]])
-
-        return best_df
-    else:
-        st.error("Could not create optimal lineup assignments.")
+        row = position_rankings[pos].row_of.get(player_name)
+        if player_name and row is not None:
+            final_selections.append(position_rankings[pos].row_data(row))
+
+    if not final_selections:
         return pd.DataFrame()
+    return pd.DataFrame(final_selections).sort_values("Position").reset_index(drop=True)
 
-def select_dynamic_bowlers_assignment(bowlers_df, fielding_df, innings_df, match_context, used_positions, used_players):
+def select_dynamic_bowlers_assignment(bowlers_df, fielding_df, innings_df, match_context, used_positions, used_players, index=None):
+    """Greedy bowler selection for the positions and players the batting pass left; the second pass of greedy_xi."""
     combo = match_context["Team_Combo"]
     unavailable = set(match_context.get("Unavailable", []))
     # Define exact required roles
@@ -392,8 +471,9 @@ def select_dynamic_bowlers_assignment(bowlers_df, fielding_df, innings_df, match
     max_positions = set(range(1, 13)) - set(used_positions)
 
     # Mapping fielding score
-    fielding_map = fielding_df.set_index("Player Name")["Predicted_Fielding_Score"].to_dict()
-    innings_summary = innings_df.groupby(["Player Name", "Position"])["Inns"].sum().reset_index()
+    if index is None:
+        index = ReliabilityIndex(innings_df, fielding_df)
+    fielding_map = index.fielding_scores
 
     bowlers_df = bowlers_df.copy()
     bowlers_df["Fielding_Score"] = bowlers_df["Player Name"].map(fielding_map).fillna(0)
@@ -404,44 +484,13 @@ def select_dynamic_bowlers_assignment(bowlers_df, fielding_df, innings_df, match
         (~bowlers_df["Player Name"].isin(used_players))
     ]
 
-    # Apply innings-aware scoring
-    player_position_scores = defaultdict(dict)
-    position_rankings = defaultdict(list)
-
+    # Apply innings-aware scoring, each position ranked by Total_Score then fielding
+    position_rankings = {}
     for pos in max_positions:
-        pos_df = bowlers_df[bowlers_df["Position"] == pos].copy()
+        pos_df = bowling_position_table(bowlers_df, index, pos)
         if pos_df.empty:
             continue
-
-        pos_inns_map = innings_summary[innings_summary["Position"] == pos].set_index("Player Name")["Inns"].to_dict()
-        std_score = pos_df["Predicted_Bowl_Score"].std()
-        std_inns = pd.Series(pos_inns_map).std()
-        total_var = std_score + std_inns + 1e-8
-        alpha = std_score / total_var
-        beta = std_inns / total_var
-
-        pos_df["Inns_at_Pos"] = pos_df["Player Name"].map(pos_inns_map).fillna(0)
-        pos_df["Max_Inns_Pos"] = max(pos_inns_map.values()) if pos_inns_map else 1
-        pos_df["Normalized_Inns"] = pos_df["Inns_at_Pos"] / pos_df["Max_Inns_Pos"]
-        pos_df["Effective_Score"] = pos_df["Predicted_Bowl_Score"] * (alpha + beta * pos_df["Normalized_Inns"])
-        pos_df["Total_Score"] = pos_df["Effective_Score"] + pos_df["Fielding_Score"]
-
-        for _, row in pos_df.iterrows():
-            name = row["Player Name"]
-            role = row["Role"]
-            score = row["Total_Score"]
-            fielding = row["Fielding_Score"]
-            player_position_scores[name][pos] = {
-                "score": score,
-                "fielding_score": fielding,
-                "data": row.to_dict()
-            }
-            position_rankings[pos].append((name, score, role, fielding, row.to_dict()))
-
-
-    # Sort each position’s ranking
-    for pos in position_rankings:
-        position_rankings[pos].sort(key=lambda x: (-x[1], -x[3]))
+        position_rankings[pos] = PositionCandidates(pos_df, "Total_Score", sort=True)
 
     # Role-aware assignment class
     class RoleAwareAssignment:
@@ -509,7 +558,9 @@ def select_dynamic_bowlers_assignment(bowlers_df, fielding_df, innings_df, match
             if assignment.get_total_assigned() >= total_required:
                 break
 
-            for name, score, role, fielding, data in position_rankings[pos]:
+            candidates = position_rankings[pos]
+            for row, name, _, _ in candidates.ranked():
+                role = candidates.roles[row]
                 if assignment.is_player_assigned(name):
                     continue
                 if not assignment.can_assign(role):
@@ -524,12 +575,16 @@ def select_dynamic_bowlers_assignment(bowlers_df, fielding_df, innings_df, match
             assigned_players = set(assignment.player_positions.keys())
             remaining_candidates = []
             for pos in unassigned_positions:
-                for name, score, role, fielding, data in position_rankings.get(pos, []):
+                if pos not in position_rankings:
+                    continue
+                candidates = position_rankings[pos]
+                for row, name, score, fielding in candidates.ranked():
+                    role = candidates.roles[row]
                     if name not in assigned_players and assignment.can_assign(role):
-                        remaining_candidates.append((pos, name, score, role, fielding, data))
+                        remaining_candidates.append((pos, name, score, role, fielding))
             remaining_candidates.sort(key=lambda x: (-x[2], -x[4]))
 
-            for pos, name, score, role, fielding, data in remaining_candidates:
+            for pos, name, score, role, fielding in remaining_candidates:
                 if assignment.get_total_assigned() >= total_required:
                     break
                 if assignment.is_player_assigned(name):
@@ -544,19 +599,151 @@ def select_dynamic_bowlers_assignment(bowlers_df, fielding_df, innings_df, match
     selected_bowlers = []
     for pos in sorted(final_assignment.assignments.keys()):
         player_name = final_assignment.get_player_at_position(pos)
-        if player_name in player_position_scores and pos in player_position_scores[player_name]:
-            player_data = player_position_scores[player_name][pos]["data"]
-            selected_bowlers.append(player_data)
-
-    final_bowlers_df = pd.DataFrame(selected_bowlers).reset_index(drop=True)
-    st.markdown("<br><br>",unsafe_allow_html=True)
-    st.subheader("🧠 Role-Constrained Optimal Bowling Selection")
-    #st.write(f"Total Bowlers Selected: {len(final_bowlers_df)} / {total_required}")
-    #st.write("This lineup arranges players into positions based on the number of pure spinners, pure pacers, and batting and bowling all-rounders selected by you.")
-    st.dataframe(final_bowlers_df[["Player Name", "Role", "Position", "Predicted_Bowl_Score"]].rename(columns={
-        "Predicted_Bowl_Score": "Predicted_Score"
-    }))
-
-    return final_bowlers_df
-
-    
\ No newline at end of file
+        candidates = position_rankings.get(pos)
+        row = candidates.row_of.get(player_name) if candidates is not None else None
+        if row is not None:
+            selected_bowlers.append(candidates.row_data(row))
+
+    return pd.DataFrame(selected_bowlers).reset_index(drop=True)
+
+BOWLING_ROLE_COUNTS = {
+    # Team_Combo key -> bowler role
+    "Pacer_Pure": "Pacer",
+    "Spinner_Pure": "Spinner",
+    "Spinner_Bowling_AR": "Bowling Allrounder (Spinner)",
+}
+BATTING_POSITIONS = range(1, 8)
+BOWLING_POSITIONS = range(1, 13)
+
+def xi_candidates(final_df, bowlers_df, innings_df, fielding_df, match_context, index=None):
+    """Every (player, position) option for the XI: batting rows (1-7) and bowling rows (1-12)."""
+    if index is None:
+        index = ReliabilityIndex(innings_df, fielding_df)
+    unavailable = set(match_context.get("Unavailable", []))
+
+    batting_tables = []
+    for pos in BATTING_POSITIONS:
+        pos_df = batting_position_table(final_df, index, pos)
+        pos_df["Rank"] = range(1, len(pos_df) + 1)
+        batting_tables.append(pos_df)
+
+    bowlers_df = bowlers_df.copy()
+    bowlers_df["Fielding_Score"] = bowlers_df["Player Name"].map(index.fielding_scores).fillna(0)
+    bowlers_df = bowlers_df[~bowlers_df["Player Name"].isin(unavailable)]
+    bowling_tables = [bowling_position_table(bowlers_df, index, pos) for pos in BOWLING_POSITIONS]
+
+    batting = pd.concat(batting_tables, ignore_index=True)
+    bowling = pd.concat([t for t in bowling_tables if not t.empty], ignore_index=True)
+
+    # No innings recorded at a position (e.g. 9-11) leaves the blend undefined; use the prediction alone
+    batting["Effective_Score"] = batting["Effective_Score"].fillna(batting["Predicted_Score"])
+    bowling["Effective_Score"] = bowling["Effective_Score"].fillna(bowling["Predicted_Bowl_Score"])
+    bowling["Total_Score"] = bowling["Effective_Score"] + bowling["Fielding_Score"]
+    return batting, bowling
+
+def greedy_xi(final_df, bowlers_df, innings_df, fielding_df, match_context, index=None):
+    """Best-effort XI from the two greedy passes: role-aware batters, then bowlers in the positions left.
+
+    Each pass fills what it can, so an infeasible Team_Combo still gets a partial XI.
+    select_optimal_xi uses this when its exact solve has no solution.
+    """
+    if index is None:
+        index = ReliabilityIndex(innings_df, fielding_df)
+    batters = select_dynamic_reliable_batters(final_df, None, innings_df, match_context, fielding_df, index=index)
+    used_positions = batters["Position"].tolist() if not batters.empty else []
+    used_players = batters["Player Name"].tolist() if not batters.empty else []
+    bowlers = select_dynamic_bowlers_assignment(
+        bowlers_df, fielding_df, innings_df, match_context, used_positions, used_players, index=index
+    )
+    return batters, bowlers
+
+def select_optimal_xi(final_df, bowlers_df, innings_df, fielding_df, match_context, time_limit=10.0, index=None):
+    """Assign the whole XI in one exact solve instead of a batting pass followed by a bowling pass.
+
+    A 0/1 integer program over every (player, position) candidate from
+    xi_candidates: each player and each position used at most once, batters
+    (incl. WK-Batsman) == Team_Combo["Batters"], at least one WK-Batsman,
+    batting all-rounders == Team_Combo["Batting_AR"], and each bowling role
+    count as in Team_Combo. Solved with scipy's HiGHS MILP.
+
+    Every (player, position) is valued by its Effective_Score, batters and
+    bowlers alike, so the two compete for positions on the same scale. Bowlers
+    also bring their Fielding_Score, as in the greedy bowling pass (Total_Score).
+    It depends only on the player, and the number of bowlers is fixed by the
+    combo, so it decides which bowlers are picked but never moves a bowler
+    ahead of a batter for a position. Batting fielding is only a tie-break.
+
+    Returns (batters_df, bowlers_df, status): status is "optimal" or
+    "infeasible" (the solver proved no XI meets the combo, e.g. too few
+    bowlers of a role for this opponent), or the solver message if it stopped
+    without a solution. In the last two cases the frames hold the partial XI
+    from the greedy passes (see greedy_xi) instead of nothing.
+    """
+    from scipy.optimize import milp, LinearConstraint, Bounds
+
+    combo = match_context["Team_Combo"]
+    if index is None:
+        index = ReliabilityIndex(innings_df, fielding_df)
+    batting, bowling = xi_candidates(final_df, bowlers_df, innings_df, fielding_df, match_context, index)
+    batting = batting[np.isfinite(batting["Effective_Score"])].reset_index(drop=True)
+    bowling = bowling[np.isfinite(bowling["Total_Score"])].reset_index(drop=True)
+    n_bat, n_bowl = len(batting), len(bowling)
+    n_vars = n_bat + n_bowl
+
+    players = pd.concat([batting["Player Name"], bowling["Player Name"]], ignore_index=True)
+    positions = pd.concat([batting["Position"], bowling["Position"]], ignore_index=True).astype(int)
+    bat_roles = batting["Role"].to_numpy()
+    bowl_roles = bowling["Role"].str.strip().str.lower().to_numpy()
+
+    rows, lower, upper = [], [], []
+
+    def add(mask, lo, hi):
+        rows.append(np.asarray(mask, dtype=np.float64))
+        lower.append(lo)
+        upper.append(hi)
+
+    bat_pad = np.zeros(n_bowl, dtype=bool)
+    bowl_pad = np.zeros(n_bat, dtype=bool)
+    for player in players.unique():
+        add(players.to_numpy() == player, 0, 1)
+    for pos in positions.unique():
+        add(positions.to_numpy() == pos, 0, 1)
+    add(np.concatenate([np.isin(bat_roles, ["Batsman", "WK-Batsman"]), bat_pad]), combo["Batters"], combo["Batters"])
+    add(np.concatenate([bat_roles == "WK-Batsman", bat_pad]), 1, np.inf)
+    add(np.concatenate([bat_roles == "Batting Allrounder", bat_pad]), combo["Batting_AR"], combo["Batting_AR"])
+    for combo_key, role in BOWLING_ROLE_COUNTS.items():
+        count = combo.get(combo_key, 0)
+        add(np.concatenate([bowl_pad, bowl_roles == role.lower()]), count, count)
+
+    bat_score = batting["Effective_Score"].to_numpy(dtype=np.float64)
+    bat_fielding = np.nan_to_num(batting["Fielding_Score"].to_numpy(dtype=np.float64))
+    fielding_scale = 1e-6 / (len(BATTING_POSITIONS) * (np.abs(bat_fielding).max(initial=0) + 1))
+    bowl_score = bowling["Effective_Score"].to_numpy(dtype=np.float64)
+    # Per-player constant: picks between bowlers, adds the same to every position a bowler could take
+    bowl_fielding = bowling["Fielding_Score"].to_numpy(dtype=np.float64)
+    value = np.concatenate([bat_score + fielding_scale * bat_fielding, bowl_score + bowl_fielding])
+
+    def fallback(status):
+        batters, bowlers = greedy_xi(final_df, bowlers_df, innings_df, fielding_df, match_context, index)
+        # Same columns as a solved XI even when a greedy pass found nobody
+        return (batters if not batters.empty else batting.iloc[0:0]), (bowlers if not bowlers.empty else bowling.iloc[0:0]), status
+
+    if n_vars == 0:
+        return fallback("infeasible")
+
+    result = milp(
+        c=-value,
+        constraints=LinearConstraint(np.vstack(rows), lower, upper),
+        integrality=np.ones(n_vars),
+        bounds=Bounds(0, 1),
+        options={"time_limit": time_limit},
+    )
+    if result.status == 2:
+        return fallback("infeasible")
+    if result.x is None:
+        return fallback(result.message)
+
+    chosen = result.x > 0.5
+    final_batters = batting[chosen[:n_bat]].sort_values("Position").reset_index(drop=True)
+    final_bowlers = bowling[chosen[n_bat:]].sort_values("Position").reset_index(drop=True)
+    return final_batters, final_bowlers, "optimal" if result.status == 0 else result.message
@@ -0,0 +1,121 @@
+# 🔹 File: runtime_config.py
+#
+# Central CPU budget and seeding for the training code (torch MLPs and the
+# LightGBM composition fallback). Streamlit serves every session from one
+# process, so without a cap each concurrent training run starts a thread pool
+# the size of the machine and they all fight over the same cores.
+#
+# Settings come from the environment and can be overridden with configure():
+#   PLAYINGXI_THREADS         intra-op threads per training run (default: cores // concurrent runs)
+#   PLAYINGXI_MAX_CONCURRENT  training runs allowed at once (default: 2)
+#   PLAYINGXI_SEED            seed for torch and LightGBM (default: 42)
+#   PLAYINGXI_DETERMINISTIC   "1" to force deterministic torch kernels and LightGBM
+
+import os
+import threading
+from contextlib import contextmanager
+
+DEFAULT_SEED = 42
+DEFAULT_MAX_CONCURRENT = 2
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+def _default_settings():
+    cpu_count = os.cpu_count() or 1
+    max_concurrent = max(1, _env_int("PLAYINGXI_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT))
+    return {
+        "threads": max(1, _env_int("PLAYINGXI_THREADS", cpu_count // max_concurrent)),
+        "max_concurrent": max_concurrent,
+        "seed": _env_int("PLAYINGXI_SEED", DEFAULT_SEED),
+        "deterministic": os.environ.get("PLAYINGXI_DETERMINISTIC", "0") == "1",
+    }
+
+_settings = _default_settings()
+_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(_settings["max_concurrent"])
+_torch_applied = None  # settings last pushed into torch
+
+def configure(threads=None, max_concurrent=None, seed=None, deterministic=None):
+    """Override the environment defaults, e.g. configure(threads=1) in pool workers."""
+    global _slots, _torch_applied
+    with _lock:
+        if threads is not None:
+            _settings["threads"] = max(1, int(threads))
+        if max_concurrent is not None:
+            _settings["max_concurrent"] = max(1, int(max_concurrent))
+            _slots = threading.BoundedSemaphore(_settings["max_concurrent"])
+        if seed is not None:
+            _settings["seed"] = int(seed)
+        if deterministic is not None:
+            _settings["deterministic"] = bool(deterministic)
+        _torch_applied = None
+    return dict(_settings)
+
+def get_settings():
+    return dict(_settings)
+
+def _apply_torch():
+    global _torch_applied
+    import torch
+
+    with _lock:
+        wanted = (_settings["threads"], _settings["deterministic"])
+        if _torch_applied == wanted:
+            return torch
+        torch.set_num_threads(_settings["threads"])
+        torch.use_deterministic_algorithms(_settings["deterministic"], warn_only=True)
+        _torch_applied = wanted
+    return torch
+
+@contextmanager
+def training_slot(use_torch=True):
+    """Hold one of the ``max_concurrent`` training slots, with torch's thread cap applied.
+
+    Concurrent sessions queue here instead of oversubscribing the cores, so
+    throughput grows with concurrency up to the core count and then stays flat.
+    Up to ``max_concurrent`` runs train at once, so nothing here touches the
+    global RNG: each run draws from its own torch_generator().
+    """
+    with _slots:
+        if use_torch:
+            _apply_torch()
+        yield dict(_settings)
+
+def torch_generator():
+    """A fresh CPU torch.Generator seeded from the settings; create one per training run."""
+    import torch
+    return torch.Generator().manual_seed(_settings["seed"])
+
+def lightgbm_params():
+    """Thread cap and seed for LGBMRegressor(**lightgbm_params())."""
+    params = {"n_jobs": _settings["threads"], "random_state": _settings["seed"]}
+    if _settings["deterministic"]:
+        params.update(deterministic=True, force_row_wise=True)
+    return params
+
+def runtime_report():
+    """Configured settings next to what the libraries actually use (torch only if already imported)."""
+    import sys
+
+    report = {
+        "cpu_count": os.cpu_count(),
+        **_settings,
+        "lightgbm_params": lightgbm_params(),
+        "OMP_NUM_THREADS": os.environ.get("OMP_NUM_THREADS"),
+    }
+    if "torch" in sys.modules:
+        torch = sys.modules["torch"]
+        report["torch_num_threads"] = torch.get_num_threads()
+        report["torch_interop_threads"] = torch.get_num_interop_threads()
+        report["torch_deterministic"] = torch.are_deterministic_algorithms_enabled()
+    return report
+
+def format_runtime_report(report=None):
+    report = runtime_report() if report is None else report
+    return "\n".join(f"{key:<24} {value}" for key, value in report.items())
+
+if __name__ == "__main__":
+    _apply_torch()
+    print(format_runtime_report())
@@ -0,0 +1,249 @@
+# 🔹 File: score_backends.py
+#
+# Regressors that turn the statistical factors into Predicted_Score /
+# Predicted_Bowl_Score. train_mlp and train_mlp_batched dispatch here for any
+# backend other than "mlp".
+#
+#   mlp    the 64-unit PyTorch MLP (default, cached in the model store)
+#   ridge  closed-form ridge regression in NumPy
+#   gbm    a small LightGBM model
+#
+# The default comes from PLAYINGXI_SCORE_BACKEND; pages and callers can pass
+# backend=... explicitly. Comparison on the current data:
+#   python score_backends.py [--tournament Series --opponent Australia ...]
+
+import os
+import time
+import numpy as np
+import pandas as pd
+
+DEFAULT_BACKEND = "mlp"
+
+def default_backend():
+    return os.environ.get("PLAYINGXI_SCORE_BACKEND") or DEFAULT_BACKEND
+
+def _fit_info(X_np, y_np, preds):
+    # Same shape as the MLP training info; one "epoch" with the training MSE
+    loss = float(np.mean((preds - np.asarray(y_np).reshape(-1)) ** 2)) if len(X_np) else None
+    return {
+        "loss_curve": [] if loss is None else [loss],
+        "epochs_run": 0 if loss is None else 1,
+        "stopped_early": False,
+        "final_loss": loss,
+        "cached": False,
+    }
+
+class RegressorBackend:
+    """fit(X, y, iyengar_w) -> model, predict(model, X) -> 1-D predictions."""
+
+    name = None
+
+    def fit(self, X_np, y_np, iyengar_w=None):
+        raise NotImplementedError
+
+    def predict(self, model, X_np):
+        raise NotImplementedError
+
+    def fit_predict_many(self, X_list, y_list, iyengar_ws=None, return_info=False, **options):
+        """One model per (X, y) pair, predictions on the training rows (what the pipeline needs)."""
+        if iyengar_ws is None:
+            iyengar_ws = [None] * len(X_list)
+        preds, infos = [], []
+        for X_np, y_np, iyengar_w in zip(X_list, y_list, iyengar_ws):
+            if len(X_np) == 0:
+                model_preds = np.zeros(0, dtype=np.float32)
+            else:
+                model_preds = self.predict(self.fit(X_np, y_np, iyengar_w), X_np)
+            preds.append(model_preds)
+            infos.append(_fit_info(X_np, y_np, model_preds))
+        if return_info:
+            return preds, infos
+        return preds
+
+class MLPBackend(RegressorBackend):
+    name = "mlp"
+
+    def __init__(self, epochs=100, lr=0.001):
+        self.epochs = epochs
+        self.lr = lr
+
+    def fit(self, X_np, y_np, iyengar_w=None):
+        from mlp_trainer import _train_stacked
+        from runtime_config import training_slot
+
+        with training_slot():
+            _, weights, _ = _train_stacked([X_np], [y_np], [iyengar_w], self.epochs, self.lr)
+        return weights[0]
+
+    def predict(self, model, X_np):
+        from mlp_trainer import predict_mlp
+        return predict_mlp(model, X_np)
+
+    def fit_predict_many(self, X_list, y_list, iyengar_ws=None, return_info=False, **options):
+        # Keeps the batched loop and the model store
+        from mlp_trainer import train_mlp_batched
+        options.setdefault("epochs", self.epochs)
+        options.setdefault("lr", self.lr)
+        return train_mlp_batched(X_list, y_list, iyengar_ws, return_info=return_info, **options)
+
+class RidgeBackend(RegressorBackend):
+    """Closed-form ridge with an intercept: (Xc'Xc + alpha*I) w = Xc'yc.
+
+    The targets are inverse-variance weighted sums of the inputs, so this
+    recovers them almost exactly in a single solve.
+    """
+
+    name = "ridge"
+
+    def __init__(self, alpha=1e-6):
+        self.alpha = alpha
+
+    def fit(self, X_np, y_np, iyengar_w=None):
+        X = np.asarray(X_np, dtype=np.float64)
+        y = np.asarray(y_np, dtype=np.float64).reshape(-1)
+        x_mean = X.mean(axis=0)
+        y_mean = y.mean()
+        Xc = X - x_mean
+        gram = Xc.T @ Xc
+        # alpha relative to the feature scale keeps the solve well conditioned
+        ridge = self.alpha * max(np.trace(gram) / max(len(gram), 1), 1e-12)
+        coef = np.linalg.solve(gram + ridge * np.eye(len(gram)), Xc.T @ (y - y_mean))
+        return {"coef": coef, "intercept": y_mean - x_mean @ coef}
+
+    def predict(self, model, X_np):
+        X = np.asarray(X_np, dtype=np.float64)
+        return (X @ model["coef"] + model["intercept"]).astype(np.float32)
+
+class GBMBackend(RegressorBackend):
+    name = "gbm"
+
+    def __init__(self, n_estimators=100, num_leaves=15, learning_rate=0.1):
+        self.n_estimators = n_estimators
+        self.num_leaves = num_leaves
+        self.learning_rate = learning_rate
+
+    def fit(self, X_np, y_np, iyengar_w=None):
+        import lightgbm as lgb
+        from runtime_config import training_slot, lightgbm_params
+
+        model = lgb.LGBMRegressor(
+            n_estimators=self.n_estimators,
+            num_leaves=self.num_leaves,
+            learning_rate=self.learning_rate,
+            min_child_samples=5,
+            verbose=-1,
+            **lightgbm_params(),
+        )
+        with training_slot(use_torch=False):
+            model.fit(np.asarray(X_np), np.asarray(y_np).reshape(-1))
+        return model
+
+    def predict(self, model, X_np):
+        return model.predict(np.asarray(X_np)).astype(np.float32)
+
+BACKENDS = {
+    "mlp": MLPBackend,
+    "ridge": RidgeBackend,
+    "gbm": GBMBackend,
+}
+
+def get_backend(name=None, **params):
+    name = name or default_backend()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown score backend {name!r}; expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](**params)
+
+def _rank_agreement(preds, reference):
+    # Spearman correlation: Pearson on the ranks
+    if len(preds) < 2:
+        return float("nan")
+    ranks = pd.Series(preds).rank().to_numpy()
+    reference_ranks = pd.Series(reference).rank().to_numpy()
+    if ranks.std() == 0 or reference_ranks.std() == 0:
+        return float("nan")
+    return float(np.corrcoef(ranks, reference_ranks)[0, 1])
+
+def compare_backends(datasets, backends=("mlp", "ridge", "gbm"), reference="mlp"):
+    """Fit/predict time and rank agreement with ``reference`` for each backend on each dataset.
+
+    ``datasets`` is {label: (X_np, y_np, iyengar_w)}. Returns one row per (dataset, backend).
+    """
+    rows = []
+    non_empty = [data for data in datasets.values() if len(data[0])]
+    if non_empty:
+        # Untimed warm-up so library imports don't land in the first row
+        for name in backends:
+            get_backend(name).fit(*non_empty[0])
+    for label, (X_np, y_np, iyengar_w) in datasets.items():
+        if len(X_np) == 0:
+            continue
+        results = {}
+        for name in backends:
+            backend = get_backend(name)
+            start = time.perf_counter()
+            model = backend.fit(X_np, y_np, iyengar_w)
+            fit_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            preds = np.asarray(backend.predict(model, X_np)).reshape(-1)
+            predict_seconds = time.perf_counter() - start
+            results[name] = (fit_seconds, predict_seconds, preds)
+
+        reference_preds = results[reference][2] if reference in results else None
+        for name, (fit_seconds, predict_seconds, preds) in results.items():
+            rows.append({
+                "Model": label,
+                "Backend": name,
+                "Rows": len(X_np),
+                "Fit ms": fit_seconds * 1000,
+                "Predict ms": predict_seconds * 1000,
+                "Train MSE": float(np.mean((preds - np.asarray(y_np).reshape(-1)) ** 2)),
+                f"Rank agreement vs {reference}": (
+                    _rank_agreement(preds, reference_preds) if reference_preds is not None else float("nan")
+                ),
+            })
+    return pd.DataFrame(rows)
+
+def context_datasets(match_context):
+    """The eight training sets (seven batting positions and bowling) for a match context."""
+    from statistical_score_calc import (
+        run_statistical_score_calc, run_statistical_bowling_score_calc,
+        get_feature_target_from_final, get_bowling_feature_target,
+    )
+    from xi_pipeline import BATTING_POSITIONS, iyengar_sudarsan_weights
+
+    datasets = {}
+    final_df, _, used_factors = run_statistical_score_calc(match_context)
+    for pos in BATTING_POSITIONS:
+        X, y, _ = get_feature_target_from_final(final_df[final_df["Position"] == pos], used_factors)
+        X_np = X.to_numpy(dtype=np.float32)
+        datasets[f"Position {pos}"] = (X_np, y.to_numpy(dtype=np.float32).reshape(-1, 1), iyengar_sudarsan_weights(X_np))
+
+    bowl_df, _, bowl_factors = run_statistical_bowling_score_calc(match_context)
+    X, y, _ = get_bowling_feature_target(bowl_df, bowl_factors)
+    X_np = X.to_numpy(dtype=np.float32)
+    datasets["Bowling"] = (X_np, y.to_numpy(dtype=np.float32).reshape(-1, 1), iyengar_sudarsan_weights(X_np))
+    return datasets
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare score backends on the current data.")
+    parser.add_argument("--tournament", default="ICC", choices=["ICC", "Series"])
+    parser.add_argument("--opponent", default=None)
+    parser.add_argument("--ground", default="Home", choices=["Home", "Away"])
+    parser.add_argument("--pitch", default="Spin", choices=["Spin", "Pace"])
+    parser.add_argument("--clutch", action="store_true")
+    parser.add_argument("--backends", default="mlp,ridge,gbm", help="Comma-separated backend names")
+    args = parser.parse_args()
+
+    match_context = {
+        "Tournament_Type": args.tournament,
+        "Opponent": args.opponent if args.tournament == "Series" else None,
+        "Ground": args.ground,
+        "Pitch_Type": args.pitch,
+        "Clutch": args.clutch,
+        "Unavailable": [],
+    }
+    report = compare_backends(context_datasets(match_context), backends=args.backends.split(","))
+    with pd.option_context("display.width", 160, "display.max_rows", None):
+        print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
@@ -0,0 +1,94 @@
+# 🔹 File: startup_profiler.py
+#
+# Startup report: python startup_profiler.py
+# Imports what the pages import, then runs each first-use initialisation,
+# and prints how long every step took.
+
+import sys
+import time
+import importlib
+from contextlib import contextmanager
+
+# Third-party packages first, so the project modules below show only their own cost
+PAGE_IMPORTS = [
+    "numpy",
+    "pandas",
+    "streamlit",
+    "data_repository",
+    "statistical_score_calc",
+    "reliability_adjuster",
+    "mlp_trainer",
+    "xi_pipeline",
+    "xi_render",
+    "composition_rule_engine_new",
+    "context_sidebar_system_generated",
+    "context_sidebar_manual_selection",
+]
+
+_timings = []
+
+@contextmanager
+def timed(label, kind="init"):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _timings.append((kind, label, time.perf_counter() - start))
+
+def timed_import(module_name):
+    already_loaded = module_name in sys.modules
+    with timed(module_name + (" (already loaded)" if already_loaded else ""), kind="import"):
+        return importlib.import_module(module_name)
+
+def _first_use_steps():
+    # Work that now happens lazily on the first real request
+    from data_repository import TABLE_NAMES, get_table, get_match_data, data_version
+
+    def load_tables():
+        for name in TABLE_NAMES:
+            get_table(name)
+
+    def import_torch():
+        from mlp_trainer import get_device
+        get_device()
+
+    def import_lightgbm():
+        import lightgbm
+        import sklearn.multioutput
+
+    def load_composition_engine():
+        from composition_rule_engine_new import warm_up
+        warm_up()
+
+    return [
+        ("data version hash", data_version),
+        ("load data tables", load_tables),
+        ("load match history", get_match_data),
+        ("torch import + device probe", import_torch),
+        ("lightgbm + sklearn import", import_lightgbm),
+        ("composition index + fallback model", load_composition_engine),
+    ]
+
+def startup_report(modules=PAGE_IMPORTS, include_first_use=True):
+    """Time each import (and optionally each lazy initialisation); returns [(kind, step, seconds)]."""
+    _timings.clear()
+    for module_name in modules:
+        timed_import(module_name)
+    if include_first_use:
+        for label, step in _first_use_steps():
+            with timed(label):
+                step()
+    return list(_timings)
+
+def format_report(timings):
+    lines = [f"{'kind':<7} {'step':<45} {'ms':>9}"]
+    for kind, label, seconds in timings:
+        lines.append(f"{kind:<7} {label:<45} {seconds * 1000:>9.1f}")
+    lines.append(f"{'':<7} {'total':<45} {sum(t for _, _, t in timings) * 1000:>9.1f}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    from runtime_config import format_runtime_report
+    print(format_report(startup_report()))
+    print()
+    print(format_runtime_report())
@@ -1,29 +1,89 @@
-import streamlit as st
 import pandas as pd
 import numpy as np
+from data_repository import get_table, get_derived
+from context_cache import ContextLRUCache
+
+# Scores are pure functions of the match context, so they are shared across sessions
+batting_score_cache = ContextLRUCache(maxsize=256)
+bowling_score_cache = ContextLRUCache(maxsize=256)
 
 def custom_normalize(x, min_x, max_x, L=0.1, U=1):
     return (U - L) * (x - min_x) / (max_x - min_x) + L if max_x != min_x else L
 
-def compute_statistical_score(df, match_context):
+def _nan_var(M):
+    # Row-wise sample variance, same arithmetic as pandas Series.var (ddof=1, skipna)
+    mask = np.isnan(M)
+    count = (~mask).sum(axis=1)
+    values = np.where(mask, 0.0, M)
+    avg = values.sum(axis=1, dtype=np.float64) / count
+    sqr = (avg[:, None] - values) ** 2
+    np.putmask(sqr, mask, 0)
+    var = sqr.sum(axis=1, dtype=np.float64) / (count - 1)
+    var[count - 1 <= 0] = np.nan
+    return var
+
+def inverse_variance_score(df, factors, L=0.1, U=1, constant_value=None, weight_scale=None):
+    """Min-max normalize all factor columns at once and combine them with inverse-std weights.
+
+    Columns with a single distinct value normalize to ``constant_value`` (``L`` when not given).
+    ``weight_scale`` optionally multiplies selected weights before the score is summed.
+    Returns the normalized matrix (one row per factor), the weights dict and the score vector.
+    """
+    constant_value = L if constant_value is None else constant_value
+
+    # One contiguous row per factor keeps each reduction identical to the per-column version
+    M = np.ascontiguousarray(df[factors].to_numpy(dtype=np.float64).T)
+    with np.errstate(all="ignore"):
+        mins = np.nanmin(M, axis=1, keepdims=True)
+        maxs = np.nanmax(M, axis=1, keepdims=True)
+        norm = (U - L) * (M - mins) / (maxs - mins) + L
+        norm[(maxs == mins).ravel()] = constant_value
+        var = _nan_var(norm)
+
+    var_dict = dict(zip(factors, var.tolist()))
+    C_k = 1 / sum(1 / np.sqrt(v) for v in var_dict.values() if v > 0)
+    weights = {col: C_k / np.sqrt(v) if v > 0 else 0 for col, v in var_dict.items()}
+    for col, scale in (weight_scale or {}).items():
+        if col in weights:
+            weights[col] *= scale
+
+    score = 0
+    for i, col in enumerate(factors):
+        score = score + weights[col] * norm[i]
+    return norm, weights, score
+
+def build_icc_batting_table(df):
+    """ICC mode inputs: per-position median score and median-imputed opponent columns.
+
+    Depends only on the data, so callers can build it once and pass it to compute_statistical_score.
+    """
+    unique_pos_opp = df.groupby(["Player ID", "Position", "Opponent"])["Final_Position_Batting_Score"].mean().reset_index()
+    median_position_score = unique_pos_opp.groupby(["Player ID", "Position"])["Final_Position_Batting_Score"].median().reset_index()
+    median_position_score.rename(columns={"Final_Position_Batting_Score": "Overall_Position_Median"}, inplace=True)
+    df = df.merge(median_position_score, on=["Player ID", "Position"], how="left")
+    df["Final_Position_Batting_Score"] = df["Overall_Position_Median"]
+    df.drop(columns=["Overall_Position_Median"], inplace=True)
+    df["Final_Opponent_Score_Recent"] = df["Final_Opponent_Score_Recent"].fillna(df["Final_Opponent_Score_Recent"].median())
+    df["Opponent_Overall_Final_Batting_Score"] = df["Opponent_Overall_Final_Batting_Score"].fillna(df["Opponent_Overall_Final_Batting_Score"].median())
+    return df
+
+def compute_statistical_score(df, match_context, icc_table=None):
     factors = []
 
-    if match_context['Unavailable']:
-        df = df[~df['Player Name'].isin(match_context['Unavailable'])]
-
     if match_context["Tournament_Type"] == "Series":
         factors += ["Final_Opponent_Score_Recent", "Opponent_Overall_Final_Batting_Score", "Final_Position_Batting_Score"]
     else:
-        unique_pos_opp = df.groupby(["Player ID", "Position", "Opponent"])["Final_Position_Batting_Score"].mean().reset_index()
-        median_position_score = unique_pos_opp.groupby(["Player ID", "Position"])["Final_Position_Batting_Score"].median().reset_index()
-        median_position_score.rename(columns={"Final_Position_Batting_Score": "Overall_Position_Median"}, inplace=True)
-        df = df.merge(median_position_score, on=["Player ID", "Position"], how="left")
-        df["Final_Position_Batting_Score"] = df["Overall_Position_Median"]
-        df.drop(columns=["Overall_Position_Median"], inplace=True)
-        df["Final_Opponent_Score_Recent"] = df["Final_Opponent_Score_Recent"].fillna(df["Final_Opponent_Score_Recent"].median())
-        df["Opponent_Overall_Final_Batting_Score"] = df["Opponent_Overall_Final_Batting_Score"].fillna(df["Opponent_Overall_Final_Batting_Score"].median())
+        # Medians and imputation come from the full data; unavailable players are dropped afterwards
+        if icc_table is None:
+            icc_table = build_icc_batting_table(df)
+        df = icc_table.copy(deep=False)
         factors += ["Final_Opponent_Score_Recent", "Opponent_Overall_Final_Batting_Score", "Final_Position_Batting_Score"]
 
+    if match_context['Unavailable']:
+        df = df[~df['Player Name'].isin(match_context['Unavailable'])]
+        if match_context["Tournament_Type"] != "Series":
+            df = df.reset_index(drop=True)
+
     if match_context["Pitch_Type"] == "Spin":
         factors.append("Final_Score_Spin")
     else:
@@ -39,40 +99,47 @@ def compute_statistical_score(df, match_context):
 
     factors += ["Final_Batsman_Overall_score"]
 
-    for col in factors:
-        min_val, max_val = df[col].min(), df[col].max()
-        df[f"Norm_{col}"] = df[col].apply(lambda x: custom_normalize(x, min_val, max_val))
-
-    var_dict = {col: df[f"Norm_{col}"].var() for col in factors}
-    C_k = 1 / sum(1 / np.sqrt(v) for v in var_dict.values() if v > 0)
-    weights = {col: C_k / np.sqrt(v) if v > 0 else 0 for col, v in var_dict.items()}
-
     # Adjust weights if Series mode and opponent provided
+    weight_scale = {}
     if match_context["Tournament_Type"] == "Series" and match_context["Opponent"]:
-        team_rank_df = pd.read_csv("TeamID.csv")
+        team_rank_df = get_table("TeamID")
         opponent_rank = team_rank_df.loc[team_rank_df["Team"] == match_context["Opponent"], "Team_Rank"].values[0]
 
         # Calculate dynamic opponent weight
         raw_strength = 1 / (opponent_rank + 1e-5)
         strength_scale = np.interp(raw_strength, [1/10, 1/1], [0.5, 2.0])  # map inverse rank to scale range
 
-        for col in weights:
-            if col in ["Final_Opponent_Score_Recent", "Opponent_Overall_Final_Batting_Score"]:
-                weights[col] *= strength_scale
+        for col in ["Final_Opponent_Score_Recent", "Opponent_Overall_Final_Batting_Score"]:
+            weight_scale[col] = strength_scale
 
-    df["True_Final_Score"] = sum(weights[col] * df[f"Norm_{col}"] for col in factors)
+    norm, weights, score = inverse_variance_score(df, factors, L=0.1, U=1, weight_scale=weight_scale)
+    for i, col in enumerate(factors):
+        df[f"Norm_{col}"] = norm[i]
+
+    df["True_Final_Score"] = score
     return df, weights, factors
 
-def run_statistical_score_calc(match_context):
-    score_df = pd.read_csv("Batting_Scores.csv")
-    final_df, final_weights, used_factors = compute_statistical_score(score_df.copy(), match_context)
+def _compute_batting_scores(match_context):
+    score_df = get_table("Batting_Scores")
+    icc_table = None
+    if match_context["Tournament_Type"] != "Series":
+        icc_table = get_derived("icc_batting_table", lambda: build_icc_batting_table(get_table("Batting_Scores")))
+    final_df, final_weights, used_factors = compute_statistical_score(score_df, match_context, icc_table)
 
     valid_roles = ["Batsman", "WK-Batsman", "Batting Allrounder"]
-    valid_players = pd.read_csv("Players.csv")
+    valid_players = get_table("Players")
     final_df = final_df[final_df["Player Name"].isin(valid_players[valid_players["Role"].isin(valid_roles)]["Player Name"])]
 
     return final_df, final_weights, used_factors
 
+def _copy_result(result):
+    # Callers add columns to the frame, so hand out copies of the cached entry
+    df, weights, factors = result
+    return df.copy(deep=False), dict(weights), list(factors)
+
+def run_statistical_score_calc(match_context):
+    return _copy_result(batting_score_cache.get_or_compute(match_context, _compute_batting_scores))
+
 def get_feature_target_from_final(final_df, used_factors):
     target_column = "True_Final_Score"
     mlp_feature_df = final_df.copy()
@@ -81,8 +148,8 @@ def get_feature_target_from_final(final_df, used_factors):
     y = mlp_feature_df[target_column]
     return X, y, mlp_feature_df
 
-def run_statistical_bowling_score_calc(match_context):
-    df = pd.read_csv("Bowler_final_score.csv")
+def _compute_bowling_scores(match_context):
+    df = get_table("Bowler_final_score")
 
     factors = []
     if match_context['Unavailable']:
@@ -105,17 +172,13 @@ def run_statistical_bowling_score_calc(match_context):
 
     factors += ["Overall_Bowling_Score"]
 
-    for col in factors:
-        min_val, max_val = df[col].min(), df[col].max()
-        df[f"Norm_{col}"] = df[col].apply(lambda x: (x - min_val) / (max_val - min_val) if max_val != min_val else 0.5)
+    norm, weights, score = inverse_variance_score(df, factors, L=0, U=1, constant_value=0.5)
+    for i, col in enumerate(factors):
+        df[f"Norm_{col}"] = norm[i]
 
-    var_dict = {col: df[f"Norm_{col}"].var() for col in factors}
-    C_k = 1 / sum(1 / np.sqrt(v) for v in var_dict.values() if v > 0)
-    weights = {col: C_k / np.sqrt(v) if v > 0 else 0 for col, v in var_dict.items()}
-
-    df["True_Final_Bowl_Score"] = sum(weights[col] * df[f"Norm_{col}"] for col in factors)
+    df["True_Final_Bowl_Score"] = score
     valid_roles = ["Pacer", "Spinner", "Bowling Allrounder (Spinner)"]
-    valid_players = pd.read_csv("Players.csv")
+    valid_players = get_table("Players")
 
     # # Filter to include those who are either pacers/spinners or have the role "Bowling Allrounder"
     # valid_roles = valid_players[valid_players["Role"] == "Bowling Allrounder"]["Player Name"].tolist()
@@ -129,6 +192,12 @@ def run_statistical_bowling_score_calc(match_context):
     # st.dataframe(valid_bowlers)
     return valid_bowlers, weights, factors
 
+def run_statistical_bowling_score_calc(match_context):
+    return _copy_result(bowling_score_cache.get_or_compute(match_context, _compute_bowling_scores))
+
+def score_cache_stats():
+    return {"batting": batting_score_cache.stats(), "bowling": bowling_score_cache.stats()}
+
 def get_bowling_feature_target(final_df, used_factors):
     target_column = "True_Final_Bowl_Score"
     mlp_feature_df = final_df.copy()
@@ -0,0 +1,401 @@
+# 🔹 File: xi_pipeline.py
+#
+# Streamlit-free Playing XI pipeline, shared by the pages and the offline
+# tools. generate_xi(match_context) runs it end to end and returns an
+# XIResult; the pages only render that (see xi_render.py).
+
+import os
+import time
+import logging
+import numpy as np
+import pandas as pd
+from statistical_score_calc import (
+    run_statistical_score_calc, run_statistical_bowling_score_calc,
+    get_feature_target_from_final, get_bowling_feature_target,
+)
+from mlp_trainer import train_mlp, train_mlp_batched
+from score_backends import default_backend
+from data_repository import get_table
+
+BATTING_POSITIONS = range(1, 8)
+
+logger = logging.getLogger(__name__)
+
+def iyengar_sudarsan_weights(X_np):
+    means = np.mean(X_np, axis=0)
+    stds = np.std(X_np, axis=0)
+    epsilon = 1e-8
+    return means / (stds + epsilon)
+
+def _log_training(label, info, backend="mlp"):
+    logger.info(
+        "%s %s: %d epochs%s, final loss %s%s",
+        label,
+        backend.upper(),
+        info["epochs_run"],
+        " (early stop)" if info["stopped_early"] else "",
+        f"{info['final_loss']:.6f}" if info["final_loss"] is not None else "n/a",
+        " [cached]" if info["cached"] else "",
+    )
+
+def predict_batting_positions(final_df, used_factors, tournament_type, early_stopping=False, return_info=False, backend=None):
+    """Train one MLP per batting position and return {"Position_<n>": per-player predictions}.
+
+    With ``return_info`` also returns {"Position_<n>": training info} (loss curve, epochs run).
+    ``backend`` picks the regressor (see score_backends); None uses the configured default.
+    """
+    backend = backend or default_backend()
+    X_list, y_list, iw_list, mlp_pos_dfs = [], [], [], []
+    for pos in BATTING_POSITIONS:
+        pos_df = final_df[final_df["Position"] == pos]
+        X_pos, y_pos, mlp_pos_df = get_feature_target_from_final(pos_df, used_factors)
+        X_pos_np = X_pos.to_numpy(dtype=np.float32)
+        y_pos_np = y_pos.to_numpy(dtype=np.float32).reshape(-1, 1)
+
+        X_list.append(X_pos_np)
+        y_list.append(y_pos_np)
+        iw_list.append(iyengar_sudarsan_weights(X_pos_np))
+        mlp_pos_dfs.append(mlp_pos_df)
+
+    # All seven position models train together in one loop
+    cache_labels = [(f"Position_{pos}", tuple(used_factors)) for pos in BATTING_POSITIONS]
+    all_preds, all_infos = train_mlp_batched(
+        X_list, y_list, iw_list, cache_labels=cache_labels, early_stopping=early_stopping, return_info=True, backend=backend
+    )
+
+    position_dfs = {}
+    training_info = {}
+    for pos, mlp_pos_df, pos_preds, info in zip(BATTING_POSITIONS, mlp_pos_dfs, all_preds, all_infos):
+        mlp_pos_df["Predicted_Score"] = pos_preds
+        training_info[f"Position_{pos}"] = info
+        _log_training(f"Position {pos}", info, backend)
+
+        if tournament_type == "ICC":
+            grouped = mlp_pos_df.groupby(["Player Name", "Position"]).agg({
+                "Predicted_Score": "median",
+                "Role": "first"
+            }).reset_index()
+        else:
+            grouped = mlp_pos_df.sort_values("Predicted_Score", ascending=False).drop_duplicates("Player Name")
+
+        position_dfs[f"Position_{pos}"] = grouped
+    if return_info:
+        return position_dfs, training_info
+    return position_dfs
+
+def predict_bowling(bowl_df, bowl_factors, early_stopping=False, return_info=False, backend=None):
+    """Train the bowling MLP and return the feature frame with Predicted_Bowl_Score (plus training info)."""
+    backend = backend or default_backend()
+    X_bowl, y_bowl, bowl_feature_df = get_bowling_feature_target(bowl_df, bowl_factors)
+    X_bowl_np = X_bowl.to_numpy(dtype=np.float32)
+    y_bowl_np = y_bowl.to_numpy(dtype=np.float32).reshape(-1, 1)
+
+    bowl_weights_mlp = iyengar_sudarsan_weights(X_bowl_np)
+    bowl_preds, info = train_mlp(
+        X_bowl_np, y_bowl_np, bowl_weights_mlp,
+        cache_label=("Bowling", tuple(bowl_factors)), early_stopping=early_stopping, return_info=True, backend=backend
+    )
+    bowl_feature_df["Predicted_Bowl_Score"] = bowl_preds
+    _log_training("Bowling", info, backend)
+    if return_info:
+        return bowl_feature_df, info
+    return bowl_feature_df
+
+def training_summary(training_info):
+    """Rows for display: one per model with epochs run and final loss."""
+    return [
+        {
+            "Model": label.replace("_", " "),
+            "Epochs": info["epochs_run"],
+            "Final Loss": info["final_loss"],
+            "Stopped Early": info["stopped_early"],
+            "Cached": info["cached"],
+        }
+        for label, info in training_info.items()
+    ]
+
+TEAM_COMBO_KEYS = ["Batters", "Batting_AR", "Spinner_Pure", "Spinner_Bowling_AR", "Pacer_Pure"]
+
+class XIResult:
+    """Everything one generate_xi run produces.
+
+    lineup                 Player Name, Role, Position of the selected XI, by position
+    batters, bowlers       the role-constrained XI split by how each player was picked
+    batting_weights        inverse-variance feature weights of the batting score
+    bowling_weights        same for the bowling score
+    used_factors, bowl_factors   the factors behind those weights
+    final_df               statistical batting scores (True_Final_Score, Norm_* columns)
+    position_dfs           {"Position_<n>": per-player Predicted_Score}
+    bowl_feature_df        bowling rows with Predicted_Bowl_Score
+    reliable_batters       position-optimal top 7 ignoring Team_Combo, with Rank
+    position_rankings      {position: PositionCandidates} behind reliable_batters
+    diagnostics            backend, batting solver, precomputed, training info, solver status, predicted role counts
+                           (when Team_Combo came from Rank_Tier), seconds per stage and in total
+    """
+
+    __slots__ = (
+        "match_context", "lineup", "batters", "bowlers",
+        "batting_weights", "bowling_weights", "used_factors", "bowl_factors",
+        "final_df", "position_dfs", "bowl_feature_df",
+        "reliable_batters", "position_rankings", "diagnostics",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields[name])
+
+    @property
+    def expected_players(self):
+        combo = self.match_context["Team_Combo"]
+        return sum(combo[key] for key in TEAM_COMBO_KEYS)
+
+    @property
+    def complete(self):
+        return len(self.lineup) == self.expected_players
+
+    def to_record(self):
+        """JSON-safe summary: context, lineup, weights and diagnostics without the frames or loss curves."""
+        return {
+            "match_context": _json_safe(self.match_context),
+            "complete": self.complete,
+            "solver_status": self.diagnostics["solver_status"],
+            "players": [str(name) for name in self.lineup["Player Name"]],
+            "lineup": _json_safe(self.lineup.to_dict("records")),
+            "batting_weights": _json_safe(self.batting_weights),
+            "bowling_weights": _json_safe(self.bowling_weights),
+            "backend": self.diagnostics["backend"],
+            "batting_solver": self.diagnostics["batting_solver"],
+            "reliable_batters": _json_safe(
+                [] if self.reliable_batters.empty else self.reliable_batters[["Position", "Player Name"]].to_dict("records")
+            ),
+            "precomputed": self.diagnostics["precomputed"],
+            "timings": _json_safe(self.diagnostics["timings"]),
+        }
+
+def _json_safe(value):
+    # NumPy scalars and tuples from the frames and weight dicts -> plain JSON types
+    if isinstance(value, dict):
+        return {str(key): _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+# Pipeline stages and the stages whose results each one needs. Stages whose
+# dependencies are met run concurrently, so with enough cores a run can
+# approach its slowest chain (load/scores -> models -> XI assignment) instead
+# of the sum. benchmarks.py times both (generate_xi[cold, N stage workers]).
+PIPELINE_STAGES = {
+    "load": (),
+    "composition": (),
+    "batting_scores": (),
+    "bowling_scores": (),
+    "batting_models": ("load", "batting_scores"),
+    "bowling_model": ("load", "bowling_scores"),
+    "reliable_batters": ("load", "batting_models"),
+    "xi_assignment": ("load", "composition", "batting_models", "bowling_model"),
+}
+
+def run_stages(stage_fns, stages=PIPELINE_STAGES, max_workers=None):
+    """Run ``stage_fns[name](results)`` for every stage once its dependencies in ``stages`` are done.
+
+    ``results`` maps finished stage names to their return values. Ready
+    stages share a thread pool of ``max_workers`` threads (default: one per
+    core, up to one per stage); torch and NumPy release the GIL for their
+    heavy work. With a single worker (e.g. on a one-core machine, where
+    threads only add contention) the stages run one at a time in
+    declaration order. The first failing stage's exception is raised.
+    Returns (results, seconds per stage).
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    results, timings = {}, {}
+    if max_workers is None:
+        max_workers = min(len(stages), os.cpu_count() or 1)
+
+    def timed_stage(name):
+        started = time.perf_counter()
+        value = stage_fns[name](results)
+        timings[name] = time.perf_counter() - started
+        return value
+
+    if max_workers == 1:
+        for name in stages:
+            results[name] = timed_stage(name)
+        return results, timings
+
+    remaining = dict(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while remaining or running:
+            for name, deps in list(remaining.items()):
+                if all(dep in results for dep in deps):
+                    running[executor.submit(timed_stage, name)] = name
+                    del remaining[name]
+            if not running:
+                raise ValueError(f"Stages with unmet dependencies: {sorted(remaining)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except BaseException:
+                    for other in running:
+                        other.cancel()
+                    raise
+    return results, timings
+
+def resolve_team_combo(match_context):
+    """(Team_Combo, role counts): the context's own Team_Combo, or one predicted from its Rank_Tier."""
+    if match_context.get("Team_Combo"):
+        return match_context["Team_Combo"], None
+    if not match_context.get("Rank_Tier"):
+        raise ValueError("match_context needs a Team_Combo or a Rank_Tier to predict one")
+    from precompute_contexts import load_precomputed_role_counts
+    from composition_rule_engine_new import get_predicted_role_counts, team_combo_from_role_counts
+
+    lookup = (match_context["Pitch_Type"], match_context["Ground"], match_context["Rank_Tier"], match_context.get("Opponent"))
+    role_counts = load_precomputed_role_counts(*lookup)
+    if role_counts is None:
+        role_counts = get_predicted_role_counts(*lookup)
+    role_counts = {role: int(count) for role, count in role_counts.items()}
+    return team_combo_from_role_counts(role_counts), role_counts
+
+def generate_xi(match_context, backend=None, use_precomputed=True, index=None, early_stopping=False, max_workers=None,
+                solver=None):
+    """Run the whole pipeline for ``match_context`` without any UI.
+
+    Scores, trains (or loads precomputed MLP results when ``use_precomputed``,
+    the backend is "mlp" and ``early_stopping`` is off), ranks batters by position and picks the XI in
+    one solve with select_optimal_xi. The context needs a Team_Combo, or a
+    Rank_Tier to predict one from the composition history. ``index`` is a
+    ReliabilityIndex to reuse; None uses the shared get_reliability_index().
+    Independent stages run concurrently on ``max_workers`` threads (see
+    PIPELINE_STAGES and run_stages); 1 runs them one after another.
+    ``solver`` picks the batting order behind reliable_batters: "greedy" or
+    "hungarian" (exact); None uses PLAYINGXI_BATTING_SOLVER, else greedy.
+    """
+    from reliability_adjuster import (
+        SOLVERS, default_solver, select_most_reliable_batters, select_optimal_xi, get_reliability_index,
+    )
+    from precompute_contexts import load_precomputed
+
+    backend = backend or default_backend()
+    solver = solver or default_solver()
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver {solver!r}; expected one of {SOLVERS}")
+    training_info = {}
+
+    def load(results):
+        # Precomputed results were trained without early stopping, so they only stand in for that
+        precomputed = load_precomputed(match_context) if use_precomputed and backend == "mlp" and not early_stopping else None
+        return {
+            "precomputed": precomputed,
+            "index": index if index is not None else get_reliability_index(),
+            "innings_df": get_table("Batting_Scores"),
+            "fielding_df": get_table("Fielding_Scores"),
+            "players_df": get_table("Players"),
+        }
+
+    def composition(results):
+        return resolve_team_combo(match_context)
+
+    def batting_scores(results):
+        return run_statistical_score_calc(match_context)
+
+    def bowling_scores(results):
+        return run_statistical_bowling_score_calc(match_context)
+
+    def batting_models(results):
+        precomputed = results["load"]["precomputed"]
+        final_df, _, used_factors = results["batting_scores"]
+        if precomputed:
+            position_dfs = precomputed["position_dfs"]
+            info = {k: v for k, v in precomputed.get("training_info", {}).items() if k.startswith("Position_")}
+        else:
+            position_dfs, info = predict_batting_positions(
+                final_df, used_factors, match_context["Tournament_Type"], early_stopping=early_stopping, return_info=True, backend=backend
+            )
+        training_info.update(info)
+        return position_dfs, pd.concat(position_dfs.values(), ignore_index=True)
+
+    def bowling_model(results):
+        precomputed = results["load"]["precomputed"]
+        bowl_df, _, bowl_factors = results["bowling_scores"]
+        if precomputed:
+            bowl_feature_df = precomputed["bowl_feature_df"]
+            training_info["Bowling"] = precomputed.get("training_info", {}).get("Bowling")
+        else:
+            bowl_feature_df, training_info["Bowling"] = predict_bowling(
+                bowl_df, bowl_factors, early_stopping=early_stopping, return_info=True, backend=backend
+            )
+        return bowl_feature_df
+
+    def reliable_batters(results):
+        loaded = results["load"]
+        return select_most_reliable_batters(
+            results["batting_models"][1], loaded["players_df"], loaded["innings_df"], solver=solver, index=loaded["index"]
+        )
+
+    def xi_assignment(results):
+        loaded = results["load"]
+        team_combo, _ = results["composition"]
+        batters, bowlers, status = select_optimal_xi(
+            results["batting_models"][1], results["bowling_model"], loaded["innings_df"], loaded["fielding_df"],
+            dict(match_context, Team_Combo=team_combo), index=loaded["index"]
+        )
+        lineup = pd.concat([
+            batters[["Player Name", "Role", "Position"]],
+            bowlers[["Player Name", "Role", "Position"]],
+        ])
+        lineup = lineup.sort_values(by="Position").reset_index(drop=True)
+        return batters, bowlers, status, lineup
+
+    started = time.perf_counter()
+    results, timings = run_stages({
+        "load": load,
+        "composition": composition,
+        "batting_scores": batting_scores,
+        "bowling_scores": bowling_scores,
+        "batting_models": batting_models,
+        "bowling_model": bowling_model,
+        "reliable_batters": reliable_batters,
+        "xi_assignment": xi_assignment,
+    }, max_workers=max_workers)
+    wall_seconds = time.perf_counter() - started
+
+    final_df, batting_weights, used_factors = results["batting_scores"]
+    _, bowling_weights, bowl_factors = results["bowling_scores"]
+    position_dfs, _ = results["batting_models"]
+    reliable_batters, position_rankings = results["reliable_batters"]
+    batters, bowlers, status, lineup = results["xi_assignment"]
+    team_combo, role_counts = results["composition"]
+    # Position models first, then bowling, as the pages list them
+    training_info = {key: training_info[key] for key in sorted(training_info, key=lambda key: key == "Bowling")}
+
+    return XIResult(
+        match_context=dict(match_context, Team_Combo=team_combo),
+        lineup=lineup,
+        batters=batters,
+        bowlers=bowlers,
+        batting_weights=batting_weights,
+        bowling_weights=bowling_weights,
+        used_factors=used_factors,
+        bowl_factors=bowl_factors,
+        final_df=final_df,
+        position_dfs=position_dfs,
+        bowl_feature_df=results["bowling_model"],
+        reliable_batters=reliable_batters,
+        position_rankings=position_rankings,
+        diagnostics={
+            "backend": backend,
+            "batting_solver": solver,
+            "precomputed": bool(results["load"]["precomputed"]),
+            "training_info": training_info,
+            "solver_status": status,
+            "role_counts": role_counts,
+            "timings": timings,
+            "wall_seconds": wall_seconds,
+        },
+    )
@@ -0,0 +1,121 @@
+# 🔹 File: xi_render.py
+#
+# Streamlit views of an XIResult (see xi_pipeline.generate_xi), shared by the
+# System Generated and Manual Selection pages.
+
+import streamlit as st
+import pandas as pd
+from xi_pipeline import BATTING_POSITIONS, training_summary
+
+def _weights_table(weights):
+    return pd.DataFrame({
+        "Feature": list(weights.keys()),
+        "Weight": list(weights.values())
+    }).sort_values(by="Weight", ascending=False)
+
+def render_reliable_batters(best_7_df, position_rankings):
+    """Position-optimal top 7 with how each position was filled and every candidate considered."""
+    if best_7_df.empty:
+        st.error("Could not create optimal lineup assignments.")
+        return
+
+    st.subheader("\U0001F3CF Position-Optimal Batting Lineup")
+    st.write(f"**Total Lineup Score: {best_7_df['Effective_Score'].sum():.4f}**")
+    st.dataframe(best_7_df[["Player Name", "Role", "Position", "Rank", "Predicted_Score", "Effective_Score", "Fielding_Score"]])
+
+    assigned = dict(zip(best_7_df["Position"], best_7_df["Player Name"]))
+    assigned_players = set(assigned.values())
+    tab1, tab2 = st.tabs(["\U0001F4CA Position Performance Analysis", "\U0001F501 Assignment Process"])
+    with tab1:
+        st.write("Each position filled with the optimal performer:")
+        for _, row in best_7_df.iterrows():
+            rank = int(row["Rank"])
+            status = "\U0001F947 Optimal" if rank == 1 else f"#{rank} choice"
+            st.write(f"**Position {int(row['Position'])}**: {row['Player Name']} - {status} (Score: {row['Effective_Score']:.4f})")
+
+    with tab2:
+        st.write("All candidates considered for each position:")
+        for pos in BATTING_POSITIONS:
+            st.write(f"**Position {pos}:**")
+            assigned_player = assigned.get(pos)
+            for i, (_, player_name, score, _) in enumerate(position_rankings[pos].ranked()):
+                if player_name == assigned_player:
+                    status = "✅ SELECTED"
+                elif player_name not in assigned_players:
+                    status = "⚪ Available for selection"
+                else:
+                    status = "❌ Already selected"
+                st.write(f"  {i+1}. {player_name} (Score: {score:.4f}) - {status}")
+            st.write("")
+
+def render_batting_breakdown(result):
+    backend = result.diagnostics["backend"]
+    st.subheader("\U0001F4C8 Statistical Score Calculation Breakdown")
+
+    st.markdown("#### \U0001F4CA Feature Weights (Inverse-Variance Based)")
+    st.dataframe(_weights_table(result.batting_weights).style.format({"Weight": "{:.6f}"}))
+
+    norm_cols = [f"Norm_{col}" for col in result.used_factors]
+    top_stat_df = result.final_df.sort_values("True_Final_Score", ascending=False)[["Player Name", "True_Final_Score"] + norm_cols].drop_duplicates("Player Name")
+
+    st.markdown("#### \U0001F4C1 Top 10 Players by True Final Score")
+    st.dataframe(top_stat_df[["Player Name", "True_Final_Score"]].head(10).reset_index(drop=True))
+
+    st.subheader("Top 5 Players Per Batting Position (Position-Specific MLP)")
+    for pos in BATTING_POSITIONS:
+        grouped = result.position_dfs[f"Position_{pos}"]
+        top_5 = grouped.sort_values("Predicted_Score", ascending=False).head(5).reset_index(drop=True)
+
+        st.markdown(f"### \U0001F3CF Position {pos}")
+        st.dataframe(top_5[["Player Name", "Role", "Predicted_Score"]])
+
+    training_info = result.diagnostics["training_info"]
+    batting_training = {k: v for k, v in training_info.items() if k.startswith("Position_")}
+    if batting_training:
+        st.markdown(f"#### \U0001F4C9 {backend.upper()} Training Summary")
+        st.dataframe(pd.DataFrame(training_summary(batting_training)).style.format({"Final Loss": "{:.6f}"}, na_rep="n/a"))
+
+    render_reliable_batters(result.reliable_batters, result.position_rankings)
+
+def render_bowling_breakdown(result):
+    backend = result.diagnostics["backend"]
+    bowl_feature_df = result.bowl_feature_df
+    st.subheader("\U0001F4C8 Statistical Score Calculation Breakdown")
+    st.subheader("\U0001F4CA Feature Weights (Inverse-Variance Based)")
+    st.dataframe(_weights_table(result.bowling_weights).style.format({"Weight": "{:.6f}"}))
+
+    st.subheader("\U0001F3AF Bowler Score Prediction and Visualization")
+    bowl_training = result.diagnostics["training_info"].get("Bowling")
+    if bowl_training and bowl_training["final_loss"] is not None:
+        st.caption(f"Bowling {backend.upper()}: {bowl_training['epochs_run']} epochs, final loss {bowl_training['final_loss']:.6f}")
+
+    st.dataframe(bowl_feature_df)
+    st.subheader("\U0001F3C6 Top Paces, Spinners and Bowling All-rounders")
+    for btype in ["Pacer", "Spinner", "Bowling Allrounder (Spinner)"]:
+        st.markdown(f"### \u26BE {btype}s")
+        sub_df = bowl_feature_df[bowl_feature_df["Role"] == btype]
+        sub_df = sub_df.sort_values("Predicted_Bowl_Score", ascending=False).drop_duplicates("Player Name")
+        st.dataframe(sub_df[["Player Name", "Role", "Position", "Predicted_Bowl_Score"]].head(5).reset_index(drop=True))
+
+def render_xi_assignment(result):
+    st.subheader("🧠 Role-Constrained Position-Optimal Batting Lineup")
+    st.write(f"**Total Lineup Score: {result.batters['Effective_Score'].sum():.4f}**")
+    st.dataframe(result.batters[["Player Name", "Role", "Position", "Predicted_Score"]])
+
+    st.markdown("<br><br>",unsafe_allow_html=True)
+    st.subheader("🧠 Role-Constrained Optimal Bowling Selection")
+    st.dataframe(result.bowlers[["Player Name", "Role", "Position", "Predicted_Bowl_Score"]].rename(columns={
+        "Predicted_Bowl_Score": "Predicted_Score"
+    }))
+    status = result.diagnostics["solver_status"]
+    if status != "optimal":
+        st.caption(f"Solver status: {status}; showing the greedy selection instead")
+
+def render_lineup_table(lineup):
+    styled_table = lineup.style\
+        .hide(axis="index")\
+        .applymap(lambda _: 'text-align: center; font-weight: 500; color: #1a73e8;', subset=['Position'])\
+        .set_table_attributes('class="styled-table"')\
+        .to_html()
+
+    st.markdown(styled_table, unsafe_allow_html=True)
@@ -0,0 +1,188 @@
+# 🔹 File: xi_service.py
+#
+# Local HTTP service: python xi_service.py [--port 8765 --workers N --queue-size M]
+# An ASGI app (Starlette, served by uvicorn) that runs generate_xi for a
+# posted match context. Requests are handled on the event loop; the CPU work
+# goes to a process pool whose workers load the shared data once (same
+# initializer as batch_xi). At most --queue-size requests are running or
+# waiting; beyond that the service answers 503 "queue full" straight away.
+#
+#   POST /xi       body: a match context as in batch_xi (Team_Combo or Rank_Tier, "id" optional)
+#                  query: backend=mlp|ridge|gbm, solver=greedy|hungarian, precomputed=0 to skip precomputed results
+#                  200 with the batch_xi record, 400 bad context (incl. an opponent not in TeamID),
+#                  backend or solver, 500 pipeline error,
+#                  503 queue full or worker crashed (the pool is rebuilt), 504 timed out
+#   GET  /health   pool size, queue capacity, requests running and counters
+#
+# starlette and uvicorn are only needed for this service.
+
+import os
+import json
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from batch_xi import normalize_context, run_context, _init_worker
+from score_backends import BACKENDS
+from reliability_adjuster import SOLVERS
+from data_repository import get_table, get_derived
+
+DEFAULT_PORT = 8765
+
+class WorkerPool:
+    """Process pool with a hard cap on requests running or waiting for a worker."""
+
+    def __init__(self, workers=None, queue_size=None, threads=1):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size or 2 * self.workers
+        self.threads = threads
+        self.pending = 0
+        self.stats = {"served": 0, "failed": 0, "rejected": 0, "timed_out": 0, "crashed": 0, "restarts": 0}
+        self._executor = None
+
+    def start(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.threads, True)
+        )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def restart(self, broken):
+        """Replace ``broken`` (a pool whose worker died) with a fresh one."""
+        # Every request on the broken pool fails the same way; only the first one restarts it
+        if self._executor is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.stats["restarts"] += 1
+        self.start()
+
+    def try_submit(self, fn, *args):
+        """An asyncio future for fn(*args) on the pool, or None when the queue is full.
+
+        A crashed worker breaks the whole pool: the futures then raise
+        BrokenProcessPool and the pool is restarted for the next requests.
+        """
+        if self.pending >= self.queue_size:
+            self.stats["rejected"] += 1
+            return None
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            future = loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # Broken before the failing requests got to restart it
+            self.restart(executor)
+            executor = self._executor
+            future = loop.run_in_executor(executor, fn, *args)
+        # Only the event loop thread touches ``pending``, so no lock is needed
+        self.pending += 1
+        # The slot stays taken until the worker finishes, even if the caller gave up waiting
+        future.add_done_callback(lambda done: self._release(done, executor))
+        return future
+
+    def _release(self, future, executor):
+        self.pending -= 1
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self.restart(executor)
+
+    def health(self):
+        return {"workers": self.workers, "queue_size": self.queue_size, "pending": self.pending, **self.stats}
+
+def _known_opponents():
+    # Series opponents need a TeamID row for their rank, see compute_statistical_score
+    return get_derived("team_names", lambda: frozenset(get_table("TeamID")["Team"]))
+
+def _validate_context(match_context):
+    opponent = match_context["Opponent"]
+    if opponent is not None and opponent not in _known_opponents():
+        raise ValueError(f"Unknown opponent {opponent!r}; expected a Team from TeamID.csv")
+    return match_context
+
+def _json_response(payload, status_code=200, headers=None):
+    from starlette.responses import Response
+
+    # json.dumps as in batch_xi, so NaN weights come through the same way
+    return Response(json.dumps(payload), status_code=status_code, headers=headers, media_type="application/json")
+
+def create_app(workers=None, queue_size=None, threads=1, backend=None, timeout=None, solver=None):
+    """Starlette app around a WorkerPool; the pool starts and stops with the app's lifespan."""
+    if backend is not None and backend not in BACKENDS:
+        raise ValueError(f"Unknown score backend {backend!r}; expected one of {sorted(BACKENDS)}")
+    if solver is not None and solver not in SOLVERS:
+        raise ValueError(f"Unknown solver {solver!r}; expected one of {SOLVERS}")
+    from contextlib import asynccontextmanager
+    from starlette.applications import Starlette
+    from starlette.routing import Route
+
+    pool = WorkerPool(workers, queue_size, threads)
+
+    async def generate(request):
+        try:
+            raw = await request.json()
+            match_context = _validate_context(normalize_context(raw))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return _json_response({"error": f"Invalid match context: {type(e).__name__}: {e}"}, 400)
+
+        request_backend = request.query_params.get("backend") or backend
+        if request_backend is not None and request_backend not in BACKENDS:
+            return _json_response({"error": f"Unknown backend {request_backend!r}; expected one of {sorted(BACKENDS)}"}, 400)
+        request_solver = request.query_params.get("solver") or solver
+        if request_solver is not None and request_solver not in SOLVERS:
+            return _json_response({"error": f"Unknown solver {request_solver!r}; expected one of {list(SOLVERS)}"}, 400)
+        use_precomputed = request.query_params.get("precomputed", "1") != "0"
+        try:
+            future = pool.try_submit(run_context, raw.get("id"), match_context, request_backend, use_precomputed, 1, request_solver)
+            if future is None:
+                return _json_response({"error": "queue full", **pool.health()}, 503, headers={"Retry-After": "1"})
+            record = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pool.stats["timed_out"] += 1
+            return _json_response({"error": f"timed out after {timeout}s"}, 504)
+        except BrokenProcessPool:
+            pool.stats["crashed"] += 1
+            return _json_response({"error": "worker process died; the pool is being restarted"}, 503, headers={"Retry-After": "1"})
+        if record["error"]:
+            pool.stats["failed"] += 1
+            return _json_response(record, 500)
+        pool.stats["served"] += 1
+        return _json_response(record)
+
+    async def health(request):
+        return _json_response(pool.health())
+
+    @asynccontextmanager
+    async def lifespan(app):
+        pool.start()
+        try:
+            yield
+        finally:
+            pool.shutdown()
+
+    app = Starlette(routes=[
+        Route("/xi", generate, methods=["POST"]),
+        Route("/health", health, methods=["GET"]),
+    ], lifespan=lifespan)
+    app.state.pool = pool
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Playing XI generation over HTTP on this machine.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    parser.add_argument("--queue-size", type=int, default=None, help="Requests running or waiting before 503 (default: 2 x workers)")
+    parser.add_argument("--threads", type=int, default=1, help="Torch/LightGBM threads per worker (default: 1)")
+    parser.add_argument("--backend", default=None, help="Default score backend: mlp, ridge or gbm")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds before a request gets 504 (default: none)")
+    parser.add_argument("--solver", choices=SOLVERS, default=None, help="Default batting-order solver: greedy or hungarian")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(
+        create_app(args.workers, args.queue_size, args.threads, args.backend, args.timeout, args.solver),
+        host=args.host, port=args.port, log_level="info",
+    )
@@ -0,0 +1,59 @@
+# 🔹 File: test_batch_xi.py
+#
+# Run from the repo root: python -m pytest -q tests
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from batch_xi import JsonlWriter, ParquetWriter, normalize_context, run_batch
+
+CONTEXT = normalize_context({"Tournament_Type": "Series", "Opponent": "Australia", "Ground": "Home",
+                             "Pitch_Type": "Spin", "Rank_Tier": "Top"})
+
+def test_nothing_pending_still_closes_the_writer(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text(json.dumps({"id": "1", "error": None}) + "\n")
+    writer = JsonlWriter(str(path))
+    assert run_batch([("1", CONTEXT)], writer, log=lambda message: None) == (0, 0)
+    assert writer._file.closed
+
+def _records():
+    # Context 1 failed and was retried, context 2 succeeded the first time
+    return [
+        {"id": "1", "error": "ValueError: boom", "complete": False, "players": []},
+        {"id": "2", "error": None, "complete": True, "players": ["A", "B"]},
+        {"id": "1", "error": None, "complete": True, "players": ["C"]},
+    ]
+
+def test_jsonl_drops_superseded_records(tmp_path):
+    writer = JsonlWriter(str(tmp_path / "out.jsonl"))
+    for record in _records():
+        writer.write(record)
+    writer.close()
+    assert writer.drop_superseded() == 1
+    assert [(r["id"], r["error"]) for r in writer.existing_records()] == [("2", None), ("1", None)]
+    assert writer.drop_superseded() == 0
+
+def test_parquet_drops_superseded_records(tmp_path):
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = str(tmp_path / "out.parquet")
+    # A part written before the batting_solver column existed
+    old = pa.table({"id": ["1"], "error": ["ValueError: boom"], "complete": [False], "players": [[]]})
+    os.makedirs(path)
+    pq.write_table(old, os.path.join(path, "part-00000.parquet"))
+
+    writer = ParquetWriter(path, flush_every=1)
+    for record in _records()[1:]:
+        writer.write(record)
+    writer.close()
+    assert writer.drop_superseded() == 1
+    df = pd.read_parquet(path)
+    assert df["id"].tolist() == ["2", "1"] and df["error"].isna().all()
+    assert [list(players) for players in df["players"]] == [["A", "B"], ["C"]]
+    assert len(writer._parts()) == 1
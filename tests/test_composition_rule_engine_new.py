@@ -0,0 +1,57 @@
+# 🔹 File: test_composition_rule_engine_new.py
+#
+# Run from the repo root: python -m pytest -q tests
+
+import os
+import sys
+import itertools
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from composition_rule_engine_new import (
+    BATTING_ROLES, MAX_BATTING_ROLES, SQUAD_SIZE, TOP_K,
+    cap_batting_roles, get_composition_index, get_predicted_role_counts_batch, team_combo_from_role_counts,
+)
+from precompute_contexts import series_opponents, GROUNDS, PITCH_TYPES, RANK_TIERS
+
+def _sidebar_contexts():
+    # Every (pitch, homeaway, rank_tier, opponent) the System Generated sidebar can ask for
+    opponents = series_opponents() + [None]
+    return list(itertools.product(PITCH_TYPES, GROUNDS, RANK_TIERS, opponents))
+
+def test_every_voted_composition_is_feasible():
+    contexts = _sidebar_contexts()
+    for ctx, role_counts in zip(contexts, get_predicted_role_counts_batch(contexts)):
+        team_combo = team_combo_from_role_counts(role_counts)
+        assert sum(role_counts.values()) == SQUAD_SIZE, ctx
+        assert team_combo["Batters"] + team_combo["Batting_AR"] <= MAX_BATTING_ROLES, ctx
+        assert role_counts.get("Wicketkeeper", 0) >= 1, ctx
+        assert min(role_counts.values()) >= 0, ctx
+
+def test_index_lookup_matches_a_full_vote():
+    index = get_composition_index()
+    # Sidebar contexts plus values no win has, which share the -1 code
+    contexts = _sidebar_contexts() + [("Mixed", "Neutral", "Top", "Mars"), ("Spin", "Home", "Low", "Mars")]
+    keys = [index.key(ctx) for ctx in contexts]
+    assert index.top_k_votes(contexts) == index._votes(keys, TOP_K)
+    # Callers get copies of the shared entries
+    index.top_k_vote(contexts[0])["Batsman"] = -1
+    assert index.top_k_vote(contexts[0]) == index._votes(keys[:1], TOP_K)[0]
+
+def test_cap_moves_excess_batting_roles_to_bowling():
+    role_counts = {"Batsman": 5, "Wicketkeeper": 1, "Batting Allrounder Spinner": 2, "Pacer": 2, "Spinner": 1}
+    shares = {"Batsman": 4.6, "Wicketkeeper": 1.0, "Batting Allrounder Spinner": 1.9, "Pacer": 2.4, "Spinner": 1.1}
+    capped = cap_batting_roles(role_counts, shares)
+    assert sum(capped[role] for role in capped if role in BATTING_ROLES) == MAX_BATTING_ROLES
+    assert sum(capped.values()) == sum(role_counts.values())
+    # Batsman was furthest over its share, Pacer furthest under
+    assert capped["Batsman"] == 4 and capped["Pacer"] == 3
+
+def test_cap_keeps_the_last_wicketkeeper():
+    role_counts = {"Wicketkeeper": 1, "Batsman": 7, "Pacer": 3}
+    capped = cap_batting_roles(role_counts, {"Wicketkeeper": 0.2, "Batsman": 7.5, "Pacer": 3.3})
+    assert capped == {"Wicketkeeper": 1, "Batsman": 6, "Pacer": 4}
+
+def test_cap_leaves_feasible_counts_alone():
+    role_counts = {"Batsman": 4, "Wicketkeeper": 1, "Batting Allrounder Pacer": 2, "Pacer": 3, "Spinner": 1}
+    assert cap_batting_roles(role_counts) == role_counts
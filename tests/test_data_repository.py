@@ -0,0 +1,44 @@
+# 🔹 File: test_data_repository.py
+#
+# Run from the repo root: python -m pytest -q tests
+
+import os
+import sys
+import threading
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import data_repository
+
+def test_slow_loader_does_not_block_other_keys():
+    started, release = threading.Event(), threading.Event()
+
+    def slow_loader():
+        started.set()
+        release.wait(10)
+        return "slow"
+
+    worker = threading.Thread(target=data_repository._get_cached, args=(("test", "slow"), slow_loader))
+    worker.start()
+    try:
+        assert started.wait(10)
+        # Another key loads while the slow loader still holds its own lock
+        assert data_repository._get_cached(("test", "fast"), lambda: "fast") == "fast"
+    finally:
+        release.set()
+        worker.join()
+    assert data_repository._get_cached(("test", "slow"), lambda: "other") == "slow"
+    data_repository.clear_cache()
+
+def test_get_table_values_are_read_only():
+    df = data_repository.get_table("Players")
+    column = df.columns[0]
+    first = df[column].iloc[0]
+    with pytest.raises(ValueError):
+        df.loc[df.index[0], column] = first + 1
+    # Adding or replacing columns stays allowed and never reaches the cache
+    df[column] = "replaced"
+    df["Extra"] = 1
+    fresh = data_repository.get_table("Players")
+    assert fresh[column].iloc[0] == first and "Extra" not in fresh.columns
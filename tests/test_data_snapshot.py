@@ -0,0 +1,55 @@
+# 🔹 File: test_data_snapshot.py
+#
+# Run from the repo root: python -m pytest -q tests
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import data_repository
+import data_snapshot
+
+@pytest.fixture
+def snapshot_env(tmp_path, monkeypatch):
+    # A snapshot built outside data/snapshot, pointed to by the environment
+    monkeypatch.setenv("PLAYINGXI_SNAPSHOT_DIR", str(tmp_path))
+    data_repository.clear_cache()
+    yield tmp_path
+    data_repository.clear_cache()
+
+def test_workers_read_the_configured_snapshot(snapshot_env):
+    data_snapshot.build_snapshot(str(snapshot_env))
+    assert data_repository._current_snapshot()
+    csv_players = data_repository.pd.read_csv(data_repository.resolve_data_path("Players.csv"))
+    assert data_repository.get_table("Players").equals(csv_players)
+
+def test_rebuild_leaves_mapped_files_alone(snapshot_env):
+    first = data_snapshot.build_snapshot(str(snapshot_env))
+    players = data_repository.get_table("Players")  # memory-mapped from the first build
+    expected = players.copy(deep=True)
+
+    second = data_snapshot.build_snapshot(str(snapshot_env))
+    assert second["build"] != first["build"]
+    assert data_snapshot.load_manifest(str(snapshot_env))["build"] == second["build"]
+    # The previous build survives one rebuild for workers still on its manifest
+    assert os.path.isdir(os.path.join(snapshot_env, first["build"]))
+    assert players.equals(expected)
+
+    data_snapshot.build_snapshot(str(snapshot_env))
+    assert not os.path.exists(os.path.join(snapshot_env, first["build"]))
+
+def test_missing_match_fields_stay_missing(tmp_path):
+    match_data = [
+        {"Match_No": "1", "Opponent": "India", "Team_Rank": 4, "Result": "Win", "Team_Composition": {"Batsman": 4}},
+        {"Match_No": "2", "Opponent": "Nepal", "Team_Composition": {"Pacer": 3}},
+    ]
+    tables = []
+    for name, df in zip(("matches", "roles"), data_snapshot.match_data_to_tables(match_data)):
+        meta = data_snapshot.write_table(df, str(tmp_path), name)
+        tables.append(data_snapshot.read_table(str(tmp_path), name, meta))
+    restored = data_snapshot.tables_to_match_data(*tables)
+    assert "Result" not in restored[1] and "Team_Rank" not in restored[1]
+    assert restored[1].get("Result", "") == "" and restored[1].get("Team_Rank", 10) == 10
+    assert restored[0]["Result"] == "Win" and restored[0]["Team_Composition"] == {"Batsman": 4}
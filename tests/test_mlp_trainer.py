@@ -0,0 +1,86 @@
+# 🔹 File: test_mlp_trainer.py
+#
+# Run from the repo root: python -m pytest -q tests
+
+import os
+import sys
+import threading
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from mlp_trainer import ConvergenceTracker, MIN_EPOCHS, train_mlp, train_mlp_batched
+from statistical_score_calc import run_statistical_bowling_score_calc, get_bowling_feature_target
+from xi_pipeline import iyengar_sudarsan_weights
+
+# Series vs Australia in a clutch match: the first Adam step from the Iyengar
+# initialisation pushes the bowling loss from 0.27 to about 37
+SPIKING_CONTEXT = {
+    "Tournament_Type": "Series", "Opponent": "Australia", "Ground": "Home",
+    "Pitch_Type": "Spin", "Clutch": True, "Unavailable": [],
+}
+
+def _bowling_problem(match_context):
+    bowl_df, _, bowl_factors = run_statistical_bowling_score_calc(match_context)
+    X, y, _ = get_bowling_feature_target(bowl_df, bowl_factors)
+    X_np = X.to_numpy(dtype=np.float32)
+    return X_np, y.to_numpy(dtype=np.float32).reshape(-1, 1), iyengar_sudarsan_weights(X_np)
+
+def _mse(preds, y_np):
+    return float(np.mean((preds - y_np.ravel()) ** 2))
+
+def test_tracker_waits_out_the_warm_up():
+    tracker = ConvergenceTracker(tol=1e-3, patience=10)
+    curve = [0.273, 36.7, 2.43] + [1.0] * (MIN_EPOCHS - 3)
+    assert not any(tracker.update(loss) for loss in curve)
+    # Patience counts from the first epoch after the warm-up
+    assert not any(tracker.update(1.0) for _ in range(10))
+    assert tracker.update(1.0)
+
+def test_early_stopping_survives_the_first_step_spike():
+    X_np, y_np, iyengar_w = _bowling_problem(SPIKING_CONTEXT)
+    full_preds, full_info = train_mlp(X_np, y_np, iyengar_w, return_info=True)
+    assert full_info["loss_curve"][1] > 10 * full_info["loss_curve"][0]
+
+    preds, info = train_mlp(X_np, y_np, iyengar_w, early_stopping=True, return_info=True)
+    mse = _mse(preds, y_np)
+    assert info["epochs_run"] > MIN_EPOCHS
+    # Never the untrained weights, never worse than the epoch training stopped at
+    assert mse < 0.1 * info["loss_curve"][0]
+    assert mse <= info["loss_curve"][-1] + 1e-6
+    assert abs(info["final_loss"] - mse) < 1e-6
+    assert np.corrcoef(preds, full_preds)[0, 1] > 0.95
+
+def test_batched_early_stopping_matches_single():
+    X_np, y_np, iyengar_w = _bowling_problem(SPIKING_CONTEXT)
+    preds, info = train_mlp(X_np, y_np, iyengar_w, early_stopping=True, return_info=True)
+    batched, infos = train_mlp_batched([X_np, X_np[:-3]], [y_np, y_np[:-3]], [iyengar_w, iyengar_w],
+                                       early_stopping=True, return_info=True)
+    assert infos[0]["epochs_run"] == info["epochs_run"]
+    assert np.abs(batched[0] - preds).max() < 1e-4
+    assert abs(infos[1]["final_loss"] - _mse(batched[1], y_np[:-3])) < 1e-6
+
+def test_xavier_runs_are_reproducible_under_concurrency():
+    import torch
+
+    rng = np.random.default_rng(0)
+    X_np = rng.random((40, 6), dtype=np.float32)
+    y_np = rng.random((40, 1), dtype=np.float32)
+    torch.manual_seed(123)
+    state = torch.random.get_rng_state()
+    reference = train_mlp(X_np, y_np, epochs=20)
+    # Training neither reads nor reseeds the global RNG
+    assert torch.equal(torch.random.get_rng_state(), state)
+    torch.rand(5)
+    assert np.array_equal(train_mlp(X_np, y_np, epochs=20), reference)
+
+    results = [None] * 4
+    def run(i):
+        results[i] = train_mlp(X_np, y_np, epochs=20)
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for preds in results:
+        assert np.array_equal(preds, reference)
@@ -0,0 +1,119 @@
+# 🔹 File: test_reliability_adjuster.py
+#
+# Run from the repo root: python -m pytest -q tests
+
+import os
+import sys
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from data_repository import get_table
+from reliability_adjuster import BOWLING_ROLE_COUNTS, BATTING_POSITIONS, BOWLING_POSITIONS, greedy_xi, select_optimal_xi, solve_assignment
+from xi_pipeline import generate_xi
+
+SERIES_CONTEXT = {
+    "Tournament_Type": "Series", "Opponent": "Australia", "Ground": "Home",
+    "Pitch_Type": "Spin", "Clutch": False, "Unavailable": [], "Rank_Tier": "Top",
+}
+
+# Predicted combo for this one needs more bowlers of a role than UAE have
+UAE_CONTEXT = dict(SERIES_CONTEXT, Opponent="United Arab Emirates", Rank_Tier="Mid")
+
+def _xi_inputs(match_context):
+    result = generate_xi(match_context, use_precomputed=False)
+    final_df = pd.concat(result.position_dfs.values(), ignore_index=True)
+    tables = (get_table("Batting_Scores"), get_table("Fielding_Scores"))
+    return (final_df, result.bowl_feature_df) + tables, result.match_context
+
+@pytest.fixture(scope="module")
+def series_inputs():
+    return _xi_inputs(SERIES_CONTEXT)
+
+def _assert_valid_xi(batters, bowlers, combo=None):
+    players = pd.concat([batters["Player Name"], bowlers["Player Name"]])
+    positions = pd.concat([batters["Position"], bowlers["Position"]]).astype(int)
+    assert players.is_unique and positions.is_unique
+    assert set(batters["Position"]) <= set(BATTING_POSITIONS) and set(bowlers["Position"]) <= set(BOWLING_POSITIONS)
+    if combo is None:
+        return
+    roles = batters["Role"].value_counts()
+    assert roles.get("Batsman", 0) + roles.get("WK-Batsman", 0) == combo["Batters"]
+    assert roles.get("WK-Batsman", 0) >= 1
+    assert roles.get("Batting Allrounder", 0) == combo["Batting_AR"]
+    bowl_roles = bowlers["Role"].str.strip().str.lower().value_counts()
+    for combo_key, role in BOWLING_ROLE_COUNTS.items():
+        assert bowl_roles.get(role.lower(), 0) == combo.get(combo_key, 0), combo_key
+    assert len(players) == sum(combo.values())
+
+def _objective(batters, bowlers):
+    return batters["Effective_Score"].sum() + bowlers["Total_Score"].sum()
+
+@pytest.mark.parametrize("combo", [
+    None,  # the predicted one
+    {"Batters": 5, "Batting_AR": 2, "Spinner_Pure": 1, "Spinner_Bowling_AR": 0, "Pacer_Pure": 3},
+    {"Batters": 7, "Batting_AR": 0, "Spinner_Pure": 1, "Spinner_Bowling_AR": 1, "Pacer_Pure": 2},
+])
+def test_optimal_xi_meets_the_combo(series_inputs, combo):
+    inputs, match_context = series_inputs
+    if combo is not None:
+        match_context = dict(match_context, Team_Combo=combo)
+    batters, bowlers, status = select_optimal_xi(*inputs, match_context)
+    assert status == "optimal"
+    _assert_valid_xi(batters, bowlers, match_context["Team_Combo"])
+    # Same objective as the solve: never below the greedy passes when they fill the XI too
+    greedy_batters, greedy_bowlers = greedy_xi(*inputs, match_context)
+    if len(greedy_batters) + len(greedy_bowlers) == sum(match_context["Team_Combo"].values()):
+        assert _objective(batters, bowlers) >= _objective(greedy_batters, greedy_bowlers) - 1e-6
+
+def test_infeasible_combo_falls_back_to_greedy():
+    inputs, match_context = _xi_inputs(UAE_CONTEXT)
+    batters, bowlers, status = select_optimal_xi(*inputs, match_context)
+    assert status == "infeasible"
+    greedy_batters, greedy_bowlers = greedy_xi(*inputs, match_context)
+    pd.testing.assert_frame_equal(batters, greedy_batters)
+    pd.testing.assert_frame_equal(bowlers, greedy_bowlers)
+    # A partial XI, not an empty one
+    assert 0 < len(batters) + len(bowlers) < sum(match_context["Team_Combo"].values())
+    _assert_valid_xi(batters, bowlers)
+
+def test_impossible_combo_still_returns_a_partial_xi(series_inputs):
+    inputs, match_context = series_inputs
+    combo = {"Batters": 1, "Batting_AR": 0, "Spinner_Pure": 0, "Spinner_Bowling_AR": 0, "Pacer_Pure": 10}
+    batters, bowlers, status = select_optimal_xi(*inputs, dict(match_context, Team_Combo=combo))
+    assert status == "infeasible"
+    assert len(batters) + len(bowlers) > 0
+    _assert_valid_xi(batters, bowlers)
+
+def _brute_force(scores, allowed):
+    # Best (positions filled, total score) over every way to put distinct players in positions
+    n_rows, n_cols = scores.shape
+    best = (0, 0.0)
+    for rows in itertools.permutations(list(range(n_rows)) + [None] * n_cols, n_cols):
+        pairs = [(r, c) for c, r in enumerate(rows) if r is not None and allowed[r, c]]
+        best = max(best, (len(pairs), sum(scores[r, c] for r, c in pairs)))
+    return best
+
+def test_hungarian_matches_brute_force():
+    rng = np.random.default_rng(7)
+    for _ in range(40):
+        n_rows, n_cols = rng.integers(2, 7), rng.integers(2, 5)
+        scores = rng.random((n_rows, n_cols)).round(2)
+        allowed = rng.random((n_rows, n_cols)) > 0.3
+        pairs = solve_assignment(scores, np.zeros_like(scores), allowed)
+        assert len({r for r, _ in pairs}) == len(pairs) and all(allowed[r, c] for r, c in pairs)
+        filled, total = _brute_force(scores, allowed)
+        assert len(pairs) == filled
+        assert abs(sum(scores[r, c] for r, c in pairs) - total) < 1e-9
+
+def test_generate_xi_uses_the_requested_solver():
+    totals = {}
+    for solver in ("greedy", "hungarian"):
+        result = generate_xi(SERIES_CONTEXT, use_precomputed=False, solver=solver)
+        assert result.diagnostics["batting_solver"] == solver
+        assert result.to_record()["batting_solver"] == solver
+        totals[solver] = result.reliable_batters["Effective_Score"].sum()
+    assert totals["hungarian"] >= totals["greedy"] - 1e-9
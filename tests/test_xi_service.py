@@ -0,0 +1,24 @@
+# 🔹 File: test_xi_service.py
+#
+# Run from the repo root: python -m pytest -q tests
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from batch_xi import normalize_context
+from xi_service import _validate_context
+
+BASE = {"Tournament_Type": "Series", "Ground": "Home", "Pitch_Type": "Spin", "Rank_Tier": "Top"}
+
+@pytest.mark.parametrize("opponent", ["UAE", "Atlantis"])
+def test_unknown_series_opponent_is_rejected(opponent):
+    with pytest.raises(ValueError, match="Unknown opponent"):
+        _validate_context(normalize_context(dict(BASE, Opponent=opponent)))
+
+def test_known_or_missing_opponent_passes():
+    assert _validate_context(normalize_context(dict(BASE, Opponent="Australia")))["Opponent"] == "Australia"
+    # Only Series matches keep an opponent
+    assert _validate_context(normalize_context(dict(BASE, Tournament_Type="World Cup", Opponent="Atlantis")))["Opponent"] is None